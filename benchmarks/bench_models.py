@@ -0,0 +1,144 @@
+"""Validation benchmarks for the large response models.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_models --sizes 100 1000 10000 --output bench_results.json
+    python -m benchmarks.bench_models --baseline bench_results.json
+
+Each model is validated from a Python dict (``model_validate``), from raw JSON bytes
+(``model_validate_json``) and from bytes decoded with orjson first, as
+``VprikolAPI._parse_response`` does before the endpoint methods validate. Memory is
+measured with tracemalloc: the peak during one validation and the allocations the
+validated model still holds afterwards. With ``--baseline`` the run is compared against
+a previous results file and the exit code is 1 if any case got slower than ``--threshold``.
+"""
+import argparse
+import gc
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+import pydantic
+
+from .fixtures import MODELS, generate
+
+MODES = ("dict", "json", "orjson")
+
+
+def _validator(model, mode: str, payload: bytes, data: Dict[str, Any]) -> Callable[[], Any]:
+    if mode == "dict":
+        return lambda: model.model_validate(data)
+    if mode == "json":
+        return lambda: model.model_validate_json(payload)
+    return lambda: model.model_validate(orjson.loads(payload))
+
+
+def _count_items(data: Dict[str, Any]) -> int:
+    return sum(len(value) for value in data.values() if isinstance(value, list)) or 1
+
+
+def _time(func: Callable[[], Any], min_time: float, min_runs: int) -> List[float]:
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_runs or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _memory(func: Callable[[], Any]) -> Dict[str, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "filename")
+    return {"peak_bytes": peak, "retained_bytes": sum(stat.size_diff for stat in stats),
+            "retained_allocations": sum(stat.count_diff for stat in stats)}
+
+
+def run(models: List[str], sizes: List[int], modes: List[str], min_time: float, min_runs: int,
+        seed: int = 0) -> Dict[str, Any]:
+    results = []
+    for name in models:
+        model = MODELS[name]
+        for size in sizes:
+            data = generate(name, size, seed)
+            payload = orjson.dumps(data)
+            items = _count_items(data)
+            for mode in modes:
+                validate = _validator(model, mode, payload, data)
+                validate()
+                timings = _time(validate, min_time, min_runs)
+                best = min(timings)
+                row = {"model": name, "size": size, "mode": mode, "payload_bytes": len(payload), "items": items,
+                       "runs": len(timings), "best_seconds": best, "median_seconds": statistics.median(timings),
+                       "ops_per_second": 1 / best if best else None, "items_per_second": items / best if best else None}
+                row.update(_memory(validate))
+                results.append(row)
+                print(f"{name:<18} {size:>7} {mode:<6} {row['median_seconds'] * 1000:>10.3f} ms "
+                      f"{row['items_per_second'] or 0:>12.0f} items/s {row['peak_bytes'] / 1024:>10.1f} KiB peak",
+                      file=sys.stderr)
+    return {"meta": {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                     "platform": platform.platform(), "pydantic": pydantic.VERSION, "orjson": orjson.__version__,
+                     "seed": seed, "created_at": time.time()},
+            "results": results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    previous = {(row["model"], row["size"], row["mode"]): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = previous.get((row["model"], row["size"], row["mode"]))
+        if old is None or not old["median_seconds"]:
+            continue
+        change = row["median_seconds"] / old["median_seconds"] - 1
+        if change > threshold:
+            regressions.append(f"{row['model']} size={row['size']} mode={row['mode']}: "
+                               f"{old['median_seconds'] * 1000:.3f} ms -> {row['median_seconds'] * 1000:.3f} ms "
+                               f"({change:+.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--min-time", type=float, default=0.5, help="minimum seconds spent timing each case")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown before a case is reported")
+    args = parser.parse_args(argv)
+
+    results = run(args.models, args.sizes, args.modes, args.min_time, args.min_runs, args.seed)
+    if args.output:
+        with open(args.output, "wb") as file:
+            file.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+
+    if args.baseline:
+        with open(args.baseline, "rb") as file:
+            regressions = compare(results, orjson.loads(file.read()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
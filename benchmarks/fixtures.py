@@ -0,0 +1,159 @@
+import datetime
+import random
+from typing import Any, Callable, Dict
+
+from vprikol.models import (PlayersResponse, ShopsResponse, ItemsResponse, MapZonesResponse, RatingResponse,
+                            EstateResponse, HostStatsResponse)
+
+_NAMES = ("Ivan", "Petr", "Sergey", "Nikita", "Artem", "Maxim", "Denis", "Oleg", "Roman", "Egor")
+_SURNAMES = ("Ivanov", "Petrov", "Sidorov", "Smirnov", "Kuznetsov", "Popov", "Volkov", "Sokolov", "Lebedev", "Kozlov")
+_NOW = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _nickname(rng: random.Random) -> str:
+    return f"{rng.choice(_NAMES)}_{rng.choice(_SURNAMES)}{rng.randint(0, 999)}"
+
+
+def _moment(rng: random.Random) -> str:
+    return (_NOW - datetime.timedelta(seconds=rng.randint(0, 30 * 86400))).isoformat()
+
+
+def players(size: int, rng: random.Random) -> Dict[str, Any]:
+    return {"server_id": 1, "server_label": "Phoenix", "updated_at": _moment(rng),
+            "players": [{"color": rng.randint(0, 2 ** 32 - 1), "ping": rng.randint(10, 300), "id": index,
+                         "lvl": rng.randint(1, 80), "nickname": _nickname(rng),
+                         "account_id": rng.randint(1, 10 ** 7), "afk_seconds": rng.choice((None, 0, rng.randint(1, 900))),
+                         "client": rng.choice((None, "pc", "mobile")), "packetloss": rng.random()}
+                        for index in range(size)]}
+
+
+def _shop_item(rng: random.Random) -> Dict[str, Any]:
+    return {"item_id": rng.randint(1, 5000), "name": f"Предмет {rng.randint(1, 5000)}", "price": rng.randint(1, 10 ** 8),
+            "count": rng.randint(1, 100), "mod_level": rng.randint(0, 12), "icon": "icon.png",
+            "acs_slot": rng.choice((None, rng.randint(0, 20))), "item_type": rng.randint(0, 10),
+            "stack_count": rng.choice((1, 100, 1000)), "is_tradeable": rng.random() < 0.7,
+            "custom_type": rng.choice((None, "skin", "accessory")), "slot_id": None, "slot_name": None}
+
+
+def shops(size: int, rng: random.Random) -> Dict[str, Any]:
+    return {"total": size, "limit": size, "offset": 0,
+            "shops": [{"server_id": 1, "server_label": "Phoenix", "shop_id": index, "nickname": _nickname(rng),
+                       "updated_at": _moment(rng),
+                       "items_sell": [_shop_item(rng) for _ in range(rng.randint(0, 20))],
+                       "items_buy": [_shop_item(rng) for _ in range(rng.randint(0, 10))]}
+                      for index in range(size)]}
+
+
+def items(size: int, rng: random.Random) -> Dict[str, Any]:
+    return {"total": size, "limit": size, "offset": 0,
+            "items": [{"item_id": index, "name": f"Предмет {index}", "icon": f"{index}.png",
+                       "acs_slot": rng.choice((None, rng.randint(0, 20))), "type": rng.randint(0, 10),
+                       "active": rng.randint(0, 1), "skin_id": rng.choice((None, rng.randint(1, 300))),
+                       "model_id": rng.choice((None, rng.randint(1, 20000))), "stack_count": rng.choice((1, 100)),
+                       "is_useable": rng.random() < 0.5, "is_tradeable": rng.random() < 0.5,
+                       "is_droppable": rng.random() < 0.5, "custom_type": None, "is_colored": False,
+                       "is_enchanted": rng.random() < 0.1, "slot_id": None, "slot_name": None,
+                       "updated_at": _moment(rng),
+                       "market_stats": rng.choice((None, {"min_price": 1, "max_price": rng.randint(1, 10 ** 7),
+                                                          "total_count": rng.randint(1, 500),
+                                                          "listings_count": rng.randint(1, 50),
+                                                          "avg_sell_price": rng.randint(1, 10 ** 6),
+                                                          "avg_buy_price": None}))}
+                      for index in range(size)]}
+
+
+def map_zones(size: int, rng: random.Random) -> Dict[str, Any]:
+    zones = []
+    for index in range(size):
+        x, y = rng.randint(-3000, 2900), rng.randint(-3000, 2900)
+        family = rng.random() < 0.3
+        zones.append({"id": index, "x1": x, "y1": y, "x2": x + 100, "y2": y + 100, "color": rng.randint(0, 2 ** 32 - 1),
+                      "type": rng.choice(("ghetto", "mafia", "family")), "money": rng.randint(0, 10 ** 6),
+                      "respects": rng.randint(0, 1000), "drugden": rng.random() < 0.1,
+                      "respawn_fraction_id": rng.choice((None, rng.randint(1, 30))),
+                      "family_id": rng.randint(1, 5000) if family else None,
+                      "family_name": _nickname(rng) if family else None,
+                      "family_color": rng.randint(0, 2 ** 24) if family else None,
+                      "family_flag": None, "family_logo": None, "zone_coin_count": None, "zone_money_amount": None})
+    return {"server_id": 1, "server_label": "Phoenix", "data": zones, "updated_at": _moment(rng),
+            "ghetto_territories_count": {"grove": 10, "ballas": 12, "vagos": 8, "rifa": 9, "aztec": 11, "nw": 4},
+            "fam_ghetto_territories_count": [{"family_id": index, "family_name": _nickname(rng),
+                                              "territory_count": rng.randint(1, 20)} for index in range(size // 20)]}
+
+
+def rating(size: int, rng: random.Random) -> Dict[str, Any]:
+    return {"server_id": 1, "server_label": "Phoenix", "rating_type": "admins", "updated_at": _moment(rng),
+            "players": [{"position": index + 1, "nickname": _nickname(rng), "value": rng.randint(0, 10 ** 6),
+                         "server_id": 1, "server_label": "Phoenix", "additional_value": None,
+                         "az_coins": rng.randint(0, 10 ** 5), "family": rng.choice((None, "Corleone"))}
+                        for index in range(size)]}
+
+
+def _estate(index: int, rng: random.Random, named: bool) -> Dict[str, Any]:
+    active = rng.random() < 0.05
+    return {"id": index, "owner": rng.choice((None, _nickname(rng))),
+            "name": f"Бизнес {index}" if named else rng.choice((None, f"Дом {index}")),
+            "auction": {"active": active, "minimal_bet": rng.randint(0, 10 ** 7),
+                        "time_end": _moment(rng) if active else None, "start_price": rng.randint(0, 10 ** 7)},
+            "coordinates": {"x": rng.uniform(-3000, 3000), "y": rng.uniform(-3000, 3000)}}
+
+
+def estate(size: int, rng: random.Random) -> Dict[str, Any]:
+    return {"server_id": 1, "server_label": "Phoenix", "updated_at": _moment(rng),
+            "houses": [_estate(index, rng, False) for index in range(size)],
+            "businesses": [_estate(index, rng, True) for index in range(size // 4)]}
+
+
+def host_stats(size: int, rng: random.Random) -> Dict[str, Any]:
+    cores = max(size // 10, 1)
+    return {"uptime_seconds": rng.randint(0, 10 ** 7), "load_avg": {"1": rng.random(), "5": rng.random(), "15": rng.random()},
+            "cpu": {"model": "AMD EPYC", "cores_physical": cores, "cores_logical": cores * 2,
+                    "usage_percent_total": rng.uniform(0, 100),
+                    "usage_percent_per_core": [rng.uniform(0, 100) for _ in range(cores * 2)],
+                    "freq_current_mhz": 3000.0, "freq_min_mhz": 1500.0, "freq_max_mhz": 3700.0,
+                    "temperature_package_c": 55.0, "temperature_per_core_c": [rng.uniform(40, 80) for _ in range(cores)]},
+            "memory": {"total_bytes": 2 ** 37, "used_bytes": 2 ** 36, "available_bytes": 2 ** 36, "free_bytes": 2 ** 35,
+                       "cached_bytes": 2 ** 34, "buffers_bytes": 2 ** 30, "percent": 50.0, "swap_total_bytes": 0,
+                       "swap_used_bytes": 0, "swap_percent": 0.0},
+            "disks": {"filesystems": [{"device": f"/dev/nvme{index}n1", "mountpoint": f"/mnt/{index}", "fstype": "ext4",
+                                       "total_bytes": 2 ** 40, "used_bytes": 2 ** 39, "free_bytes": 2 ** 39,
+                                       "percent": 50.0} for index in range(max(size // 50, 1))],
+                      "io": [{"name": f"nvme{index}n1", "read_bytes_per_sec": rng.randint(0, 10 ** 9),
+                              "write_bytes_per_sec": rng.randint(0, 10 ** 9), "read_iops": rng.uniform(0, 10 ** 5),
+                              "write_iops": rng.uniform(0, 10 ** 5)} for index in range(max(size // 50, 1))],
+                      "smart": [{"name": f"nvme{index}n1", "health_ok": True, "temperature_c": 40.0,
+                                 "power_on_hours": 10000, "percentage_used": 3} for index in range(max(size // 50, 1))]},
+            "network": [{"name": f"eth{index}", "is_up": True, "speed_mbps": 10000,
+                         "rx_bytes_per_sec": rng.randint(0, 10 ** 9), "tx_bytes_per_sec": rng.randint(0, 10 ** 9),
+                         "rx_packets_per_sec": rng.uniform(0, 10 ** 6), "tx_packets_per_sec": rng.uniform(0, 10 ** 6),
+                         "rx_total_bytes": rng.randint(0, 10 ** 15), "tx_total_bytes": rng.randint(0, 10 ** 15),
+                         "rx_errors": 0, "tx_errors": 0, "rx_dropped": 0, "tx_dropped": 0}
+                        for index in range(max(size // 50, 1))],
+            "sensors": [{"chip": "k10temp", "label": f"Tccd{index}", "kind": "temperature",
+                         "value": rng.uniform(30, 90), "unit": "C"} for index in range(size)],
+            "collected_at": _NOW.timestamp()}
+
+
+FIXTURES: Dict[str, Callable[[int, random.Random], Dict[str, Any]]] = {
+    "PlayersResponse": players,
+    "ShopsResponse": shops,
+    "ItemsResponse": items,
+    "MapZonesResponse": map_zones,
+    "RatingResponse": rating,
+    "EstateResponse": estate,
+    "HostStatsResponse": host_stats,
+}
+
+MODELS = {
+    "PlayersResponse": PlayersResponse,
+    "ShopsResponse": ShopsResponse,
+    "ItemsResponse": ItemsResponse,
+    "MapZonesResponse": MapZonesResponse,
+    "RatingResponse": RatingResponse,
+    "EstateResponse": EstateResponse,
+    "HostStatsResponse": HostStatsResponse,
+}
+
+
+def generate(model: str, size: int, seed: int = 0) -> Dict[str, Any]:
+    return FIXTURES[model](size, random.Random(f"{model}:{size}:{seed}"))
@@ -2,5 +2,25 @@ from .main import VprikolAPI
 from .api import VprikolAPIError
 from .backend import VprikolBackend
 from .models import RatingType, EstateType, SSFont
+from .sessions import SessionTracker
+from .ratings import RatingTracker
+from .online_history import OnlineHistoryStore
+from .find_cache import FindPlayerCache
+from .find_batch import FindPlayerBatch
+from .nicknames import NicknameIndex
+from .estate_index import EstateIndex
+from .rosters import FractionRosterTracker
+from .punishes import PunishStore
+from .moderation import ModerationPipeline
+from .item_catalog import ItemCatalog
+from .item_search import ItemSearchIndex
+from .marketplace_mirror import MarketplaceMirror
+from .currency import CurrencyTracker
+from .host_metrics import HostStatsCollector
+from .metrics import RequestMetrics
+from .cassette import Cassette
+from .transport import Transport, AiohttpTransport, MockTransport, CoalescingTransport
+from .request_log import RequestLogAnalytics
+from .screenshots import ScreenshotBatch
 
-__all__ = ["VprikolAPI", "VprikolAPIError", "VprikolBackend", "RatingType", "EstateType", "SSFont"]
+__all__ = ["VprikolAPI", "VprikolAPIError", "VprikolBackend", "RatingType", "EstateType", "SSFont", "SessionTracker", "RatingTracker", "OnlineHistoryStore", "FindPlayerCache", "FindPlayerBatch", "NicknameIndex", "EstateIndex", "FractionRosterTracker", "PunishStore", "ModerationPipeline", "ItemCatalog", "ItemSearchIndex", "MarketplaceMirror", "CurrencyTracker", "HostStatsCollector", "RequestMetrics", "Cassette", "Transport", "AiohttpTransport", "MockTransport", "CoalescingTransport", "RequestLogAnalytics", "ScreenshotBatch"]
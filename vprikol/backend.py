@@ -1,23 +1,31 @@
+import time
 import orjson
-import aiohttp
 from typing import List, Optional, Literal
 
 from .api import VprikolAPIError
+from .cassette import Cassette
+from .transport import AiohttpTransport, Transport
+from .metrics import RequestMetrics, RequestTrace, instrumented, record_request, trace_configs
 from .models.backend import (BackendMeResponse, MarketAlertSubscriptionEntry, NotificationSubscriptionEntry, TgAuthConfirmResponse, DndSettings,
                              ForumThreadEntry, BroadcastAudienceResponse, PromoActivationResponse, PromoCodeEntry,
                              TelegramStarsPaymentResponse, TelegramStarsConfirmResponse, TelegramStarsPreCheckoutResponse)
 from .models.items import MarketDealsResponse
 
 
+@instrumented
 class VprikolBackend:
-    def __init__(self, bot_token: str, platform: Literal["tg", "vk"], base_url: str = "https://backend.szx.su/"):
+    def __init__(self, bot_token: str, platform: Literal["tg", "vk"], base_url: str = "https://backend.szx.su/",
+                 metrics: Optional[RequestMetrics] = None, cassette: Optional[Cassette] = None,
+                 transport: Optional[Transport] = None):
         self.base_url = base_url
         self.platform = platform
+        self.metrics = metrics
+        self.cassette = cassette
         self._headers = {
             "X-Bot-Token": bot_token,
             "User-Agent": "vprikol-python-lib-backend",
         }
-        self._session: Optional[aiohttp.ClientSession] = None
+        self.transport: Transport = transport or AiohttpTransport(self._headers, trace_configs=trace_configs(metrics))
 
     async def __aenter__(self):
         await self.create_session()
@@ -27,45 +35,59 @@ class VprikolBackend:
         await self.close()
 
     async def create_session(self):
-        if self._session and not self._session.closed:
-            return
-        self._session = aiohttp.ClientSession(
-            headers=self._headers,
-            json_serialize=lambda x: orjson.dumps(x).decode()
-        )
+        await self.transport.open()
 
     async def close(self):
-        if self._session and not self._session.closed:
-            await self._session.close()
+        await self.transport.close()
 
     @staticmethod
-    async def _make_request(session: aiohttp.ClientSession, method: str, url: str,
-                            params: dict, json_body):
-        async with session.request(method, url, params=params, json=json_body) as response:
-            if 200 <= response.status < 300:
-                if response.status == 204:
-                    return None
-                if response.content_type == "application/json":
-                    return await response.json(loads=orjson.loads)
-                return await response.read()
-            if response.content_type == "application/json":
-                error_data = await response.json(loads=orjson.loads)
-            else:
-                error_data = {"detail": f"HTTP {response.status}", "status_code": response.status}
-            raise VprikolAPIError(status_code=response.status, error_data=error_data)
+    def _parse_response(status: int, content_type: str, body: bytes):
+        if 200 <= status < 300:
+            if status == 204:
+                return None
+            if content_type == "application/json":
+                return orjson.loads(body)
+            return body
+        if content_type == "application/json":
+            error_data = orjson.loads(body)
+        else:
+            error_data = {"detail": f"HTTP {status}", "status_code": status}
+        raise VprikolAPIError(status_code=status, error_data=error_data)
 
     async def _request(self, method: str, path: str, params: dict = None, json_body=None):
-        url = f"{self.base_url}{path}"
         cleaned_params = {k: v for k, v in (params or {}).items() if v is not None}
 
-        if self._session and not self._session.closed:
-            return await self._make_request(self._session, method, url, cleaned_params, json_body)
+        if self.metrics is None:
+            return await self._send(method, path, cleaned_params, json_body)
+
+        trace = RequestTrace(path, len(orjson.dumps(json_body)) if json_body is not None else 0)
+        try:
+            response = await self._send(method, path, cleaned_params, json_body, trace)
+        except BaseException as e:
+            trace.finish(e)
+            raise
         else:
-            async with aiohttp.ClientSession(
-                headers=self._headers,
-                json_serialize=lambda x: orjson.dumps(x).decode()
-            ) as session:
-                return await self._make_request(session, method, url, cleaned_params, json_body)
+            trace.finish()
+            return response
+        finally:
+            record_request(self.metrics, type(self).__name__, trace)
+
+    async def _send(self, method: str, path: str, params: dict, json_body, trace: Optional[RequestTrace] = None):
+        if self.cassette is not None:
+            played = await self.cassette.play(method, path, params, json_body)
+            if played is not None:
+                if trace is not None:
+                    trace.headers_received(played[0])
+                    trace.body_received(len(played[2]))
+                return self._parse_response(*played)
+
+        url = f"{self.base_url}{path}"
+        started = time.perf_counter()
+        status, content_type, body = await self.transport.request(method, url, params, json_body, None, trace)
+        if self.cassette is not None:
+            self.cassette.record(method, path, params, json_body, None, status, content_type, body,
+                                 time.perf_counter() - started)
+        return self._parse_response(status, content_type, body)
 
     async def get_me(self, platform_user_id: int) -> BackendMeResponse:
         response = await self._request(
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import io
+import os
+import struct
+import zlib
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+import aiohttp
+import orjson
+
+_FRAME = struct.Struct("<II")
+_Key = Tuple[str, str, bytes, str]
+
+
+class CassetteMissError(LookupError):
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        super().__init__(f"В кассете нет записи для {method} {path}")
+
+
+class _Recording:
+    __slots__ = ("status", "content_type", "body", "elapsed")
+
+    def __init__(self, status: int, content_type: str, body: bytes, elapsed: float):
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.elapsed = elapsed
+
+
+def _body_digest(json_body: Any, data: Any) -> str:
+    if json_body is not None:
+        return hashlib.blake2b(orjson.dumps(json_body, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    if isinstance(data, aiohttp.FormData):
+        digest = hashlib.blake2b(digest_size=16)
+        # FormData keeps its fields private; file fields are hashed by content and rewound so the request
+        # still sends them in full.
+        for type_options, headers, value in data._fields:
+            digest.update(orjson.dumps([sorted(type_options.items()), sorted(headers.items())]))
+            digest.update(hashlib.blake2b(_field_bytes(value), digest_size=16).digest())
+        return digest.hexdigest()
+    return "" if data is None else type(data).__name__
+
+
+def _field_bytes(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    if isinstance(value, io.IOBase):
+        position = value.tell()
+        content = value.read()
+        value.seek(position)
+        return content if isinstance(content, bytes) else str(content).encode()
+    return str(value).encode()
+
+
+def _make_key(method: str, path: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any) -> _Key:
+    params_key = orjson.dumps(sorted((str(key), str(value)) for key, value in (params or {}).items()))
+    return method.upper(), path, params_key, _body_digest(json_body, data)
+
+
+class Cassette:
+    def __init__(self, path: str, mode: Literal["record", "replay", "auto"] = "replay", latency: float = 0.0,
+                 realtime: bool = False, compression_level: int = 6):
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.realtime = realtime
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+        self._index: Dict[_Key, List[_Recording]] = {}
+        self._cursors: Dict[_Key, int] = {}
+        self._load()
+
+    def __len__(self) -> int:
+        return sum(len(recordings) for recordings in self._index.values())
+
+    async def play(self, method: str, path: str, params: Optional[Dict[str, Any]] = None, json_body: Any = None,
+                   data: Any = None) -> Optional[Tuple[int, str, bytes]]:
+        if self.mode == "record":
+            return None
+        key = _make_key(method, path, params, json_body, data)
+        recordings = self._index.get(key)
+        if not recordings:
+            self.misses += 1
+            if self.mode == "replay":
+                raise CassetteMissError(method, path)
+            return None
+
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = (cursor + 1) % len(recordings)
+        recording = recordings[cursor]
+        self.hits += 1
+        delay = self.latency + (recording.elapsed if self.realtime else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return recording.status, recording.content_type, zlib.decompress(recording.body)
+
+    def record(self, method: str, path: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+               status: int, content_type: str, body: bytes, elapsed: float = 0.0) -> None:
+        key = _make_key(method, path, params, json_body, data)
+        compressed = zlib.compress(body, self.compression_level)
+        header = orjson.dumps([key[0], key[1], key[2].decode(), key[3], status, content_type, elapsed])
+        with open(self.path, "ab") as file:
+            file.write(_FRAME.pack(len(header), len(compressed)) + header + compressed)
+        self._index.setdefault(key, []).append(_Recording(status, content_type, compressed, elapsed))
+
+    def rewind(self) -> None:
+        self._cursors.clear()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as file:
+            content = file.read()
+
+        offset = 0
+        while offset + _FRAME.size <= len(content):
+            header_size, body_size = _FRAME.unpack_from(content, offset)
+            start = offset + _FRAME.size
+            end = start + header_size + body_size
+            if end > len(content):
+                break
+            try:
+                method, path, params_key, digest, status, content_type, elapsed = \
+                    orjson.loads(content[start:start + header_size])
+            except (orjson.JSONDecodeError, ValueError):
+                break
+            key = (method, path, params_key.encode(), digest)
+            self._index.setdefault(key, []).append(
+                _Recording(status, content_type, content[start + header_size:end], elapsed))
+            offset = end
+
+        if offset < len(content) and self.mode != "replay":
+            with open(self.path, "r+b") as file:
+                file.truncate(offset)
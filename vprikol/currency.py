@@ -0,0 +1,116 @@
+import datetime
+import heapq
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from pydantic import BaseModel
+
+from .main import VprikolAPI
+from .models import CurrencyResponse
+
+CURRENCY_FIELDS = ("btc", "ltc", "eth", "euro", "asc", "vc_buy", "vc_sell")
+
+
+class CurrencyRoute(BaseModel):
+    from_server_id: int
+    to_server_id: int
+    rate: float
+
+
+class _CurrencyRing:
+    __slots__ = ("capacity", "size", "cursor", "times", "columns", "latest")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.size = 0
+        self.cursor = 0
+        self.times = array("q", bytes(8 * capacity))
+        self.columns = {field: array("q", bytes(8 * capacity)) for field in CURRENCY_FIELDS}
+        self.latest: Optional[CurrencyResponse] = None
+
+    def append(self, currency: CurrencyResponse) -> bool:
+        timestamp = int(currency.updated_at.timestamp())
+        if self.size and timestamp <= self.times[(self.cursor - 1) % self.capacity]:
+            return False
+        self.times[self.cursor] = timestamp
+        for field, column in self.columns.items():
+            column[self.cursor] = getattr(currency, field)
+        self.cursor = (self.cursor + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.latest = currency
+        return True
+
+    def ordered(self, column: array) -> List[int]:
+        start = (self.cursor - self.size) % self.capacity
+        if start + self.size <= self.capacity:
+            return column[start:start + self.size].tolist()
+        return column[start:].tolist() + column[:self.cursor].tolist()
+
+
+class CurrencyTracker:
+    def __init__(self, capacity: int = 1440, fee: float = 0.0):
+        self.capacity = capacity
+        self.fee = fee
+        self._rings: Dict[int, _CurrencyRing] = {}
+        self._server_ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._matrix: Optional[List[array]] = None
+
+    async def refresh(self, api: VprikolAPI) -> int:
+        return self.feed(await api.get_all_currencies())
+
+    def feed(self, currencies: Iterable[CurrencyResponse]) -> int:
+        added = 0
+        for currency in currencies:
+            ring = self._rings.get(currency.server_id)
+            if ring is None:
+                ring = self._rings[currency.server_id] = _CurrencyRing(self.capacity)
+            added += ring.append(currency)
+        if added:
+            self._matrix = None
+        return added
+
+    def get_latest(self, server_id: int) -> Optional[CurrencyResponse]:
+        ring = self._rings.get(server_id)
+        return ring.latest if ring else None
+
+    def get_history(self, server_id: int, field: str) -> List[Tuple[datetime.datetime, int]]:
+        if field not in CURRENCY_FIELDS:
+            raise ValueError(f"Неизвестная валюта: {field}")
+        ring = self._rings.get(server_id)
+        if ring is None:
+            return []
+        times = ring.ordered(ring.times)
+        return [(datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc), value)
+                for timestamp, value in zip(times, ring.ordered(ring.columns[field]))]
+
+    def get_rate(self, from_server_id: int, to_server_id: int) -> float:
+        matrix = self._get_matrix()
+        source = self._positions.get(from_server_id)
+        target = self._positions.get(to_server_id)
+        if source is None or target is None:
+            return 0.0
+        return matrix[source][target]
+
+    def get_best_routes(self, from_server_id: Optional[int] = None, to_server_id: Optional[int] = None,
+                        limit: int = 10) -> List[CurrencyRoute]:
+        matrix = self._get_matrix()
+        everything = range(len(self._server_ids))
+        sources = everything if from_server_id is None else \
+            [self._positions[from_server_id]] if from_server_id in self._positions else []
+        targets = everything if to_server_id is None else \
+            [self._positions[to_server_id]] if to_server_id in self._positions else []
+        best = heapq.nlargest(limit, ((matrix[source][target], source, target)
+                                      for source in sources for target in targets
+                                      if source != target and matrix[source][target] > 0))
+        return [CurrencyRoute(from_server_id=self._server_ids[source], to_server_id=self._server_ids[target], rate=rate)
+                for rate, source, target in best]
+
+    def _get_matrix(self) -> List[array]:
+        if self._matrix is None:
+            self._server_ids = sorted(self._rings)
+            self._positions = {server_id: index for index, server_id in enumerate(self._server_ids)}
+            buy = [self._rings[server_id].latest.vc_buy for server_id in self._server_ids]
+            sell = array("d", (self._rings[server_id].latest.vc_sell * (1 - self.fee) for server_id in self._server_ids))
+            zero = array("d", bytes(8 * len(sell)))
+            self._matrix = [array("d", (value / price for value in sell)) if price > 0 else zero for price in buy]
+        return self._matrix
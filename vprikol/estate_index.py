@@ -0,0 +1,109 @@
+import datetime
+import heapq
+import math
+from typing import Dict, List, Optional, Set, Tuple, Union
+from pydantic import BaseModel
+
+from .models import EstateResponse, EstateHistoryEntry, HouseEntry, BusinessEntry, EstateHistoryType
+
+EstateEntry = Union[HouseEntry, BusinessEntry]
+EstateKey = Tuple[EstateHistoryType, int]
+
+
+class EstateOwnerChange(BaseModel):
+    estate_type: EstateHistoryType
+    estate_id: int
+    change: EstateHistoryEntry
+
+
+class EstateIndex:
+    def __init__(self, cell_size: float = 250.0):
+        self.cell_size = cell_size
+        self.server_id: Optional[int] = None
+        self.updated_at: Optional[datetime.datetime] = None
+        self._entries: Dict[EstateKey, EstateEntry] = {}
+        self._owners: Dict[str, Set[EstateKey]] = {}
+        self._cells: Dict[Tuple[int, int], Set[EstateKey]] = {}
+        self._auctions: List[Tuple[datetime.datetime, EstateHistoryType, int]] = []
+
+    def feed(self, estate: EstateResponse, partial: bool = False) -> List[EstateOwnerChange]:
+        if self.server_id is not None and estate.server_id != self.server_id:
+            raise ValueError("Индекс уже заполнен данными другого сервера.")
+        is_initial = self.server_id is None
+        self.server_id = estate.server_id
+        self.updated_at = estate.updated_at
+
+        entries: Dict[EstateKey, EstateEntry] = {}
+        for house in estate.houses:
+            entries[(EstateHistoryType.HOUSE, house.id)] = house
+        for business in estate.businesses:
+            entries[(EstateHistoryType.BUSINESS, business.id)] = business
+
+        changes = []
+        for key, entry in entries.items():
+            previous = self._entries.get(key)
+            previous_owner = previous.owner if previous is not None else None
+            if previous is not None:
+                self._unlink(key, previous)
+            self._link(key, entry)
+            if not is_initial and previous_owner != entry.owner:
+                changes.append(EstateOwnerChange(
+                    estate_type=key[0], estate_id=key[1],
+                    change=EstateHistoryEntry(previous_owner=previous_owner, new_owner=entry.owner,
+                                              estate_name=entry.name, action_at=estate.updated_at)
+                ))
+        if not partial:
+            for key in [key for key in self._entries if key not in entries]:
+                self._unlink(key, self._entries.pop(key))
+
+        self._auctions = [(entry.auction.time_end, key[0], key[1]) for key, entry in self._entries.items()
+                          if entry.auction.active and entry.auction.time_end is not None]
+        heapq.heapify(self._auctions)
+        return changes
+
+    def get(self, estate_type: EstateHistoryType, estate_id: int) -> Optional[EstateEntry]:
+        return self._entries.get((estate_type, estate_id))
+
+    def get_owned(self, nickname: str) -> List[EstateEntry]:
+        return [self._entries[key] for key in sorted(self._owners.get(nickname.lower(), ()))]
+
+    def get_ending_auctions(self, limit: int = 10, after: Optional[datetime.datetime] = None) -> List[EstateEntry]:
+        auctions = self._auctions if after is None else (item for item in self._auctions if item[0] >= after)
+        return [self._entries[(estate_type, estate_id)] for _, estate_type, estate_id in heapq.nsmallest(limit, auctions)]
+
+    def get_nearest(self, x: float, y: float, radius: float,
+                    estate_type: Optional[EstateHistoryType] = None) -> List[EstateEntry]:
+        reach = math.ceil(radius / self.cell_size)
+        cell_x, cell_y = self._cell(x, y)
+        found = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                for key in self._cells.get((cell_x + dx, cell_y + dy), ()):
+                    if estate_type is not None and key[0] != estate_type:
+                        continue
+                    entry = self._entries[key]
+                    distance = math.hypot(entry.coordinates.x - x, entry.coordinates.y - y)
+                    if distance <= radius:
+                        found.append((distance, key))
+        found.sort()
+        return [self._entries[key] for _, key in found]
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _link(self, key: EstateKey, entry: EstateEntry) -> None:
+        self._entries[key] = entry
+        if entry.owner:
+            self._owners.setdefault(entry.owner.lower(), set()).add(key)
+        self._cells.setdefault(self._cell(entry.coordinates.x, entry.coordinates.y), set()).add(key)
+
+    def _unlink(self, key: EstateKey, entry: EstateEntry) -> None:
+        if entry.owner:
+            owned = self._owners.get(entry.owner.lower())
+            if owned is not None:
+                owned.discard(key)
+                if not owned:
+                    del self._owners[entry.owner.lower()]
+        cell = self._cells.get(self._cell(entry.coordinates.x, entry.coordinates.y))
+        if cell is not None:
+            cell.discard(key)
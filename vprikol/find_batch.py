@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from pydantic import BaseModel
+
+from .api import VprikolAPIError
+from .find_cache import FindPlayerCache
+from .main import VprikolAPI
+from .models import FindPlayerResponse
+
+
+class FindTarget(BaseModel):
+    server_id: int
+    nickname: Optional[str] = None
+    account_id: Optional[int] = None
+    priority: int = 0
+
+    @property
+    def key(self) -> Tuple[int, Union[int, str]]:
+        return self.server_id, self.account_id if self.account_id is not None else self.nickname.lower()
+
+
+class FindPlayerBatch:
+    def __init__(self, api: VprikolAPI, cache: Optional[FindPlayerCache] = None, concurrency: int = 4,
+                 token_id: Optional[int] = None, **find_kwargs: Any):
+        self.api = api
+        self.cache = cache
+        self.concurrency = concurrency
+        self.token_id = token_id
+        self.find_kwargs = find_kwargs
+        self._pending: Dict[Tuple[int, Union[int, str]], FindTarget] = {}
+
+    @property
+    def pending(self) -> List[FindTarget]:
+        return sorted(self._pending.values(), key=lambda target: -target.priority)
+
+    def add(self, server_id: int, nickname: Optional[str] = None, account_id: Optional[int] = None,
+            priority: int = 0) -> None:
+        if not nickname and not account_id:
+            raise ValueError("Необходимо указать nickname или account_id.")
+        target = FindTarget(server_id=server_id, nickname=nickname, account_id=account_id, priority=priority)
+        existing = self._pending.get(target.key)
+        if existing is None or existing.priority < priority:
+            self._pending[target.key] = target
+
+    async def run(self) -> AsyncIterator[Tuple[FindTarget, Union[FindPlayerResponse, Exception]]]:
+        targets = self.pending
+        if self.cache is not None and not self.find_kwargs.get("bypass_privacy"):
+            uncached = []
+            for target in targets:
+                cached = await self.cache.lookup(target.server_id, nickname=target.nickname,
+                                                 account_id=target.account_id,
+                                                 is_premium=self.find_kwargs.get("is_premium", False))
+                if cached is None:
+                    uncached.append(target)
+                    continue
+                del self._pending[target.key]
+                yield target, cached
+            targets = uncached
+        if not targets:
+            return
+
+        limits = await self.api.get_token_limits(self.token_id)
+        if not limits.bypass_antifloods:
+            targets = targets[:max(0, limits.find_limit - limits.find_used)]
+        if not targets:
+            return
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        exhausted = asyncio.Event()
+
+        async def lookup(target: FindTarget) -> Tuple[FindTarget, Optional[Union[FindPlayerResponse, Exception]]]:
+            async with semaphore:
+                if exhausted.is_set():
+                    return target, None
+                try:
+                    if self.cache is not None:
+                        response = await self.cache.find_player(self.api, target.server_id, nickname=target.nickname,
+                                                                account_id=target.account_id, **self.find_kwargs)
+                    else:
+                        response = await self.api.find_player(target.server_id, nickname=target.nickname,
+                                                              account_id=target.account_id, **self.find_kwargs)
+                except VprikolAPIError as e:
+                    if e.status_code == 429:
+                        exhausted.set()
+                        return target, None
+                    self._pending.pop(target.key, None)
+                    return target, e
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Connection errors and the like are transient: the target stays pending for the next run.
+                    return target, e
+                self._pending.pop(target.key, None)
+                return target, response
+
+        tasks = [asyncio.ensure_future(lookup(target)) for target in targets]
+        try:
+            for future in asyncio.as_completed(tasks):
+                target, result = await future
+                if result is not None:
+                    yield target, result
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,133 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+from typing import Any, Optional
+
+from .main import VprikolAPI
+from .models import FindPlayerResponse
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS find_player (
+    server_id INTEGER NOT NULL,
+    account_id INTEGER NOT NULL,
+    is_premium INTEGER NOT NULL,
+    nickname TEXT NOT NULL,
+    is_hidden INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    fetched_at REAL NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (server_id, account_id, is_premium)
+);
+CREATE INDEX IF NOT EXISTS find_player_nickname ON find_player (server_id, nickname);
+"""
+
+
+class FindPlayerCache:
+    def __init__(self, path: str, max_age: float = 600, hidden_max_age: float = 3600,
+                 refetch_interval: float = 60, timeout: float = 30):
+        self.path = path
+        self.max_age = max_age
+        self.hidden_max_age = hidden_max_age
+        self.refetch_interval = refetch_interval
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vprikol-find-cache")
+        self._db = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
+
+    def get(self, server_id: int, nickname: Optional[str] = None, account_id: Optional[int] = None,
+            is_premium: bool = False) -> Optional[FindPlayerResponse]:
+        if not nickname and not account_id:
+            raise ValueError("Необходимо указать nickname или account_id.")
+        with self._lock:
+            row = self._select(server_id, nickname, account_id, is_premium)
+        if row is None:
+            return None
+
+        is_hidden, updated_at, fetched_at, payload = row
+        now = time.time()
+        max_age = self.hidden_max_age if is_hidden else self.max_age
+        if now - updated_at > max_age and now - fetched_at > self.refetch_interval:
+            return None
+        return FindPlayerResponse.model_validate(orjson.loads(payload)).model_copy(update={"is_cached": True})
+
+    def _select(self, server_id: int, nickname: Optional[str], account_id: Optional[int], is_premium: bool) -> Any:
+        if account_id is not None:
+            return self._db.execute(
+                "SELECT is_hidden, updated_at, fetched_at, payload FROM find_player "
+                "WHERE server_id = ? AND account_id = ? AND is_premium = ?",
+                (server_id, account_id, int(is_premium))
+            ).fetchone()
+        return self._db.execute(
+            "SELECT is_hidden, updated_at, fetched_at, payload FROM find_player "
+            "WHERE server_id = ? AND nickname = ? AND is_premium = ? ORDER BY updated_at DESC LIMIT 1",
+            (server_id, nickname.lower(), int(is_premium))
+        ).fetchone()
+
+    def put(self, response: FindPlayerResponse, is_premium: bool = False) -> None:
+        payload = response.model_dump(mode="json", by_alias=True)
+        payload["user_vote"] = None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO find_player "
+                "(server_id, account_id, is_premium, nickname, is_hidden, updated_at, fetched_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (response.server.server_id, response.general.account_id, int(is_premium),
+                 response.general.nickname.lower(), int(response.is_hidden), response.updated_at.timestamp(),
+                 time.time(), orjson.dumps(payload))
+            )
+
+    def invalidate(self, server_id: int, nickname: Optional[str] = None, account_id: Optional[int] = None) -> None:
+        if not nickname and not account_id:
+            raise ValueError("Необходимо указать nickname или account_id.")
+        with self._lock:
+            if account_id is not None:
+                self._db.execute("DELETE FROM find_player WHERE server_id = ? AND account_id = ?",
+                                 (server_id, account_id))
+            else:
+                self._db.execute("DELETE FROM find_player WHERE server_id = ? AND nickname = ?",
+                                 (server_id, nickname.lower()))
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM find_player WHERE fetched_at < ?", (time.time() - older_than,))
+            return cursor.rowcount
+
+    async def find_player(self, api: VprikolAPI, server_id: int, nickname: Optional[str] = None,
+                          account_id: Optional[int] = None, is_premium: bool = False,
+                          bypass_privacy: bool = False, **kwargs: Any) -> FindPlayerResponse:
+        if bypass_privacy:
+            return await api.find_player(server_id, nickname=nickname, account_id=account_id, is_premium=is_premium,
+                                         bypass_privacy=bypass_privacy, **kwargs)
+
+        cached = await self.lookup(server_id, nickname=nickname, account_id=account_id, is_premium=is_premium)
+        if cached is not None:
+            return cached
+        response = await api.find_player(server_id, nickname=nickname, account_id=account_id,
+                                         is_premium=is_premium, **kwargs)
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda: self.put(response, is_premium=is_premium))
+        except sqlite3.OperationalError:
+            pass
+        return response
+
+    async def lookup(self, server_id: int, nickname: Optional[str] = None, account_id: Optional[int] = None,
+                     is_premium: bool = False) -> Optional[FindPlayerResponse]:
+        if not nickname and not account_id:
+            raise ValueError("Необходимо указать nickname или account_id.")
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda: self.get(server_id, nickname=nickname, account_id=account_id,
+                                                 is_premium=is_premium))
+        except sqlite3.OperationalError:
+            return None
@@ -0,0 +1,163 @@
+import bisect
+import math
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+from pydantic import BaseModel
+
+from .main import VprikolAPI
+from .models import HostStatsResponse
+
+_MISSING = float("nan")
+
+
+class HostMetricSummary(BaseModel):
+    metric: str
+    count: int
+    last: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+def _percentile(values: List[float], q: float) -> float:
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _flatten(stats: HostStatsResponse) -> Iterator[Tuple[str, Optional[float]]]:
+    yield "uptime_seconds", stats.uptime_seconds
+    yield "load_avg.one", stats.load_avg.one
+    yield "load_avg.five", stats.load_avg.five
+    yield "load_avg.fifteen", stats.load_avg.fifteen
+
+    cpu = stats.cpu
+    yield "cpu.usage_percent_total", cpu.usage_percent_total
+    yield "cpu.freq_current_mhz", cpu.freq_current_mhz
+    yield "cpu.temperature_package_c", cpu.temperature_package_c
+    for index, value in enumerate(cpu.usage_percent_per_core):
+        yield f"cpu.core.{index}.usage_percent", value
+    for index, value in enumerate(cpu.temperature_per_core_c):
+        yield f"cpu.core.{index}.temperature_c", value
+
+    for field, value in stats.memory:
+        yield f"memory.{field}", value
+
+    for filesystem in stats.disks.filesystems:
+        yield f"fs.{filesystem.mountpoint}.used_bytes", filesystem.used_bytes
+        yield f"fs.{filesystem.mountpoint}.free_bytes", filesystem.free_bytes
+        yield f"fs.{filesystem.mountpoint}.percent", filesystem.percent
+    for disk in stats.disks.io:
+        yield f"disk.{disk.name}.read_bytes_per_sec", disk.read_bytes_per_sec
+        yield f"disk.{disk.name}.write_bytes_per_sec", disk.write_bytes_per_sec
+        yield f"disk.{disk.name}.read_iops", disk.read_iops
+        yield f"disk.{disk.name}.write_iops", disk.write_iops
+    for smart in stats.disks.smart:
+        for field in ("temperature_c", "percentage_used", "data_units_read", "data_units_written",
+                      "media_errors", "reallocated_sectors"):
+            yield f"smart.{smart.name}.{field}", getattr(smart, field)
+
+    for iface in stats.network:
+        for field, value in iface:
+            if field not in ("name", "speed_mbps"):
+                yield f"net.{iface.name}.{field}", value
+
+    for sensor in stats.sensors:
+        yield f"sensor.{sensor.chip}.{sensor.label}", sensor.value
+
+
+class HostStatsCollector:
+    def __init__(self, capacity: int = 720):
+        self.capacity = capacity
+        self.size = 0
+        self._cursor = 0
+        self._times = array("d", bytes(8 * capacity))
+        self._series: Dict[str, array] = {}
+        self._last_seen: Dict[str, int] = {}
+        self._samples = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    async def collect(self, api: VprikolAPI) -> HostStatsResponse:
+        stats = await api.get_host_stats()
+        self.feed(stats)
+        return stats
+
+    def feed(self, stats: HostStatsResponse) -> bool:
+        if self.size and stats.collected_at <= self._times[(self._cursor - 1) % self.capacity]:
+            return False
+        cursor = self._cursor
+        self._times[cursor] = stats.collected_at
+        for series in self._series.values():
+            series[cursor] = _MISSING
+        for metric, value in _flatten(stats):
+            if value is None:
+                continue
+            series = self._series.get(metric)
+            if series is None:
+                series = self._series[metric] = array("d", [_MISSING]) * self.capacity
+            series[cursor] = float(value)
+            self._last_seen[metric] = self._samples
+        self._samples += 1
+        for metric in [metric for metric, seen in self._last_seen.items() if self._samples - seen > self.capacity]:
+            del self._series[metric]
+            del self._last_seen[metric]
+        self._cursor = (cursor + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    def get_metrics(self, prefix: str = "") -> List[str]:
+        return sorted(metric for metric in self._series if metric.startswith(prefix))
+
+    def get_series(self, metric: str, window: Optional[float] = None) -> List[Tuple[float, float]]:
+        series = self._series.get(metric)
+        if series is None:
+            return []
+        times, values = self._window(series, window)
+        return [(moment, value) for moment, value in zip(times, values) if value == value]
+
+    def get_rate(self, metric: str, window: Optional[float] = None) -> Optional[float]:
+        points = self.get_series(metric, window)
+        if len(points) < 2 or points[-1][0] <= points[0][0]:
+            return None
+        increase = 0.0
+        for (_, previous), (_, current) in zip(points, points[1:]):
+            increase += current - previous if current >= previous else current
+        return increase / (points[-1][0] - points[0][0])
+
+    def get_summary(self, metric: str, window: Optional[float] = None) -> HostMetricSummary:
+        values = [value for _, value in self.get_series(metric, window)]
+        if not values:
+            return HostMetricSummary(metric=metric, count=0)
+        last = values[-1]
+        values.sort()
+        return HostMetricSummary(metric=metric, count=len(values), last=last, min=values[0], max=values[-1],
+                                 mean=math.fsum(values) / len(values), p50=_percentile(values, 0.5),
+                                 p95=_percentile(values, 0.95), p99=_percentile(values, 0.99))
+
+    def snapshot(self, window: Optional[float] = None, prefix: str = "") -> Dict[str, object]:
+        metrics = {}
+        for metric in self.get_metrics(prefix):
+            summary = self.get_summary(metric, window)
+            if summary.count:
+                metrics[metric] = [summary.last, summary.min, summary.max, summary.p50, summary.p95, summary.p99]
+        return {"collected_at": self._times[(self._cursor - 1) % self.capacity] if self.size else None,
+                "samples": self.size, "fields": ["last", "min", "max", "p50", "p95", "p99"], "metrics": metrics}
+
+    def _window(self, series: array, window: Optional[float]) -> Tuple[List[float], List[float]]:
+        start = (self._cursor - self.size) % self.capacity
+        if start + self.size <= self.capacity:
+            times = self._times[start:start + self.size].tolist()
+            values = series[start:start + self.size].tolist()
+        else:
+            times = self._times[start:].tolist() + self._times[:self._cursor].tolist()
+            values = series[start:].tolist() + series[:self._cursor].tolist()
+        if window is not None and times:
+            first = bisect.bisect_left(times, times[-1] - window)
+            times, values = times[first:], values[first:]
+        return times, values
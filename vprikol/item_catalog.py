@@ -0,0 +1,127 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+from pydantic import ValidationError
+
+from .main import VprikolAPI
+from .models import ItemEntry, ItemHistoryEntry
+from .storage import write_snapshot, read_snapshot
+
+_DELETE_ACTIONS = {"delete", "deleted", "remove", "removed"}
+
+
+class ItemCatalog:
+    def __init__(self, path: Optional[str] = None, page_size: int = 100, max_patch: int = 1000):
+        self.path = path
+        self.page_size = page_size
+        self.max_patch = max_patch
+        self.history_total = 0
+        self.reloads = 0
+        self._items: Dict[int, ItemEntry] = {}
+        self._by_skin: Dict[int, List[int]] = {}
+        self._by_model: Dict[int, List[int]] = {}
+        snapshot = read_snapshot(path) if path else None
+        if snapshot is not None:
+            self.history_total = snapshot["history_total"]
+            self._set_items(ItemEntry.model_validate(item) for item in snapshot["items"])
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[ItemEntry]:
+        return iter(self._items.values())
+
+    def get(self, item_id: int) -> Optional[ItemEntry]:
+        return self._items.get(item_id)
+
+    def get_by_skin(self, skin_id: int) -> List[ItemEntry]:
+        return [self._items[item_id] for item_id in self._by_skin.get(skin_id, ())]
+
+    def get_by_model(self, model_id: int) -> List[ItemEntry]:
+        return [self._items[item_id] for item_id in self._by_model.get(model_id, ())]
+
+    async def reload(self, api: VprikolAPI) -> int:
+        history = await api.get_items_history(limit=1)
+        items: List[ItemEntry] = []
+        while True:
+            page = await api.get_items(limit=self.page_size, offset=len(items))
+            items.extend(page.items)
+            if not page.items or len(items) >= page.total:
+                break
+        self.history_total = history.total
+        self.reloads += 1
+        self._set_items(items)
+        self.save()
+        return len(items)
+
+    async def refresh(self, api: VprikolAPI) -> int:
+        if not self._items:
+            return await self.reload(api)
+
+        page = await api.get_items_history(limit=self.page_size)
+        new_count = page.total - self.history_total
+        if new_count == 0:
+            return 0
+        if new_count < 0 or new_count > self.max_patch:
+            return await self.reload(api)
+
+        changes = list(page.changes[:new_count])
+        while len(changes) < new_count:
+            page = await api.get_items_history(limit=min(self.page_size, new_count - len(changes)), offset=len(changes))
+            if not page.changes:
+                break
+            changes.extend(page.changes)
+        changes.sort(key=lambda change: change.created_at)
+
+        if not self.apply(changes):
+            return await self.reload(api)
+        listing = await api.get_items(limit=1)
+        if listing.total != len(self._items):
+            return await self.reload(api)
+        self.history_total += new_count
+        self.save()
+        return len(changes)
+
+    def apply(self, changes: Iterable[ItemHistoryEntry]) -> bool:
+        for change in changes:
+            item = self._items.get(change.item_id)
+            if item is None:
+                return False
+            if change.action in _DELETE_ACTIONS:
+                self._unlink(item)
+                del self._items[item.item_id]
+                continue
+            if not change.field_name or change.field_name not in ItemEntry.model_fields:
+                return False
+            data = item.model_dump()
+            data[change.field_name] = change.new_value
+            try:
+                patched = ItemEntry.model_validate(data)
+            except ValidationError:
+                return False
+            self._unlink(item)
+            self._link(patched)
+        return True
+
+    def save(self) -> None:
+        if self.path:
+            write_snapshot(self.path, {"history_total": self.history_total,
+                                       "items": [item.model_dump(mode="json") for item in self._items.values()]})
+
+    def _set_items(self, items: Iterable[ItemEntry]) -> None:
+        self._items = {}
+        self._by_skin = {}
+        self._by_model = {}
+        for item in items:
+            self._link(item)
+
+    def _link(self, item: ItemEntry) -> None:
+        self._items[item.item_id] = item
+        if item.skin_id is not None:
+            self._by_skin.setdefault(item.skin_id, []).append(item.item_id)
+        if item.model_id is not None:
+            self._by_model.setdefault(item.model_id, []).append(item.item_id)
+
+    def _unlink(self, item: ItemEntry) -> None:
+        if item.skin_id is not None and item.item_id in self._by_skin.get(item.skin_id, ()):
+            self._by_skin[item.skin_id].remove(item.item_id)
+        if item.model_id is not None and item.item_id in self._by_model.get(item.model_id, ()):
+            self._by_model[item.model_id].remove(item.item_id)
@@ -0,0 +1,210 @@
+import bisect
+import heapq
+import re
+from collections import Counter
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .item_catalog import ItemCatalog
+from .models import ItemEntry
+
+_SEPARATORS = re.compile(r"[\W_]+")
+_NAME_WEIGHT = 2
+_EXTRA_WEIGHT = 1
+
+
+def normalize(text: str) -> str:
+    return _SEPARATORS.sub(" ", text.casefold().replace("ё", "е")).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+class ItemSearchIndex:
+    def __init__(self, items: Iterable[ItemEntry] = (), min_score: float = 0.3):
+        self.min_score = min_score
+        self._items: Dict[int, ItemEntry] = {}
+        self._names: Dict[int, str] = {}
+        self._grams: Dict[int, Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # Normalized names, shortest first and joined by newlines, rebuilt lazily for substring scans.
+        self._text: Optional[str] = None
+        self._order: List[int] = []
+        self._offsets: List[int] = []
+        self.update(items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def update(self, items: Iterable[ItemEntry]) -> int:
+        changed = 0
+        for item in items:
+            grams = self._item_grams(item)
+            if self._grams.get(item.item_id) == grams:
+                self._items[item.item_id] = item
+                continue
+            self.remove(item.item_id)
+            self._items[item.item_id] = item
+            self._names[item.item_id] = normalize(item.name)
+            self._text = None
+            self._grams[item.item_id] = grams
+            for gram, weight in grams.items():
+                self._postings.setdefault(gram, {})[item.item_id] = weight
+            changed += 1
+        return changed
+
+    def remove(self, item_id: int) -> None:
+        grams = self._grams.pop(item_id, None)
+        self._items.pop(item_id, None)
+        if self._names.pop(item_id, None) is not None:
+            self._text = None
+        for gram in grams or ():
+            posting = self._postings[gram]
+            posting.pop(item_id, None)
+            if not posting:
+                del self._postings[gram]
+
+    def sync(self, catalog: ItemCatalog) -> int:
+        present = {item.item_id for item in catalog}
+        removed = [item_id for item_id in self._items if item_id not in present]
+        for item_id in removed:
+            self.remove(item_id)
+        return self.update(catalog) + len(removed)
+
+    def search(self, query: str, limit: int = 10, min_score: Optional[float] = None) -> List[ItemEntry]:
+        normalized = normalize(query)
+        query_grams = trigrams(normalized)
+        if not query_grams:
+            return []
+        threshold = self.min_score if min_score is None else min_score
+
+        grams = sorted((gram for gram in query_grams if gram in self._postings),
+                       key=lambda gram: len(self._postings[gram]))
+        if not grams or limit <= 0:
+            return []
+        maximum = len(query_grams) * _NAME_WEIGHT
+
+        # Items whose name contains the query are found by scanning the joined names and ranked first;
+        # every other item has no name bonus, so the limit-th best relevance so far bounds which
+        # postings can still contribute. Those are counted rarest first and their items scored in order
+        # of their best possible relevance until none is left that could place.
+        seen: Set[int] = set()
+        best: List[Tuple[float, int, int]] = []
+
+        def offer(item_id: int, bonus: float = 0.0) -> None:
+            seen.add(item_id)
+            entry = self._entry(item_id, query_grams, maximum, threshold, bonus)
+            if entry is None:
+                return
+            if len(best) < limit:
+                heapq.heappush(best, entry)
+            else:
+                heapq.heappushpop(best, entry)
+
+        def reachable(score: int) -> bool:
+            relevance = score / maximum
+            return relevance >= threshold and (len(best) < limit or relevance >= best[0][0])
+
+        def fits(score: int, item_id: int) -> bool:
+            # An item that could at most tie the limit-th best still has to win on the tie-breakers.
+            relevance = score / maximum
+            return relevance >= threshold and (
+                len(best) < limit or (relevance, -len(self._names[item_id]), item_id) > best[0])
+
+        # Names are scanned in tie-breaking order, so once the best relevance any of them could reach does
+        # not place, nothing after it does. That is a full match with the prefix bonus unless no item has
+        # every query trigram, in which case each misses at least one name weight.
+        complete: Optional[Set[int]] = None
+        partial = (maximum - _NAME_WEIGHT) / maximum
+        for item_id, bonus in self._matches(normalized):
+            if len(best) == limit:
+                length = len(self._names[item_id])
+                if complete is None and (2.0, -length, item_id) >= best[0]:
+                    complete = self._complete(grams) if len(grams) == len(query_grams) else set()
+                if ((1.0 if complete is None or complete else partial) + 1.0, -length, item_id) < best[0]:
+                    break
+                if complete is not None and (
+                        (1.0 if item_id in complete else partial) + bonus, -length, item_id) < best[0]:
+                    continue
+            offer(item_id, bonus)
+
+        counts: Counter = Counter()
+        remaining = len(grams) * _NAME_WEIGHT
+        position = 0
+        warm = len(best) == limit
+        while position < len(grams) and reachable(remaining):
+            counts.update(self._postings[grams[position]].keys())
+            remaining -= _NAME_WEIGHT
+            position += 1
+            if not warm and len(counts) >= limit:
+                # Score the best candidates of the rarest postings to tighten the bound early.
+                warm = True
+                for item_id, _ in counts.most_common(limit):
+                    if item_id not in seen:
+                        offer(item_id)
+        if position < len(grams):
+            # Score the best counted candidates, keep the others that could still place and complete
+            # their counts from the postings that were not counted.
+            order = sorted(counts.items(), key=itemgetter(1), reverse=True)
+            for item_id, _ in order[:limit]:
+                if item_id not in seen:
+                    offer(item_id)
+            low, high = 0, len(order)
+            while low < high:
+                middle = (low + high) // 2
+                if reachable(order[middle][1] * _NAME_WEIGHT + remaining):
+                    low = middle + 1
+                else:
+                    high = middle
+            counts = Counter(dict(order[:low]))
+            for gram in grams[position:]:
+                counts.update(self._postings[gram].keys() & counts.keys())
+        for item_id, count in sorted(counts.items(), key=itemgetter(1), reverse=True):
+            if not reachable(count * _NAME_WEIGHT):
+                break
+            if item_id not in seen and fits(count * _NAME_WEIGHT, item_id):
+                offer(item_id)
+        return [self._items[item_id] for _, _, item_id in sorted(best, reverse=True)]
+
+    def _complete(self, grams: List[str]) -> Set[int]:
+        complete = set(self._postings[grams[0]])
+        for gram in grams[1:]:
+            if not complete:
+                break
+            complete = self._postings[gram].keys() & complete
+        return complete
+
+    def _matches(self, normalized: str) -> Iterator[Tuple[int, float]]:
+        if self._text is None:
+            self._order = sorted(self._names, key=lambda item_id: (len(self._names[item_id]), -item_id))
+            self._offsets = [0]
+            for item_id in self._order:
+                self._offsets.append(self._offsets[-1] + len(self._names[item_id]) + 1)
+            self._text = "\n".join(self._names[item_id] for item_id in self._order)
+        text, offsets = self._text, self._offsets
+        start = text.find(normalized)
+        while start >= 0:
+            index = bisect.bisect_right(offsets, start) - 1
+            yield self._order[index], 1.0 if start == offsets[index] else 0.5
+            start = text.find(normalized, offsets[index + 1])
+
+    def _entry(self, item_id: int, query_grams: Set[str], maximum: int, threshold: float,
+               bonus: float) -> Optional[Tuple[float, int, int]]:
+        grams = self._grams[item_id]
+        relevance = sum(map(grams.__getitem__, query_grams.intersection(grams))) / maximum
+        if relevance < threshold:
+            return None
+        return relevance + bonus, -len(self._names[item_id]), item_id
+
+    @staticmethod
+    def _item_grams(item: ItemEntry) -> Dict[str, int]:
+        grams = {gram: _EXTRA_WEIGHT for field in (item.slot_name, item.custom_type) if field
+                 for gram in trigrams(normalize(field))}
+        grams.update((gram, _NAME_WEIGHT) for gram in trigrams(normalize(item.name)))
+        return grams
@@ -0,0 +1,117 @@
+import re
+from typing import Iterable, List, Optional, Tuple
+
+_STRUCTURE = re.compile(rb'["\[\]{},]')
+_STRING_END = re.compile(rb'["\\]')
+_MAX_KEY_SIZE = 256
+
+
+class JsonArrayScanner:
+    def __init__(self, keys: Optional[Iterable[str]] = None):
+        self.keys = {key.encode() for key in keys} if keys is not None else None
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[bytes] = None
+        self._active: Optional[bytes] = None
+        self._element_depth = 0
+        self._element_start: Optional[int] = None
+        # Start of a pending primitive element (string, number, literal) that ends at the next ',' or ']'.
+        self._scalar_start: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[Tuple[Optional[str], bytes]]:
+        buffer = self._buffer
+        buffer += chunk
+        pos = self._pos
+        elements: List[Tuple[Optional[str], bytes]] = []
+
+        while True:
+            if self._in_string:
+                match = _STRING_END.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    if self._string_start is not None and pos - self._string_start > _MAX_KEY_SIZE:
+                        self._string_start = None
+                        self._last_key = None
+                    break
+                if buffer[match.start()] == 0x5C:
+                    if match.end() >= len(buffer):
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                if self._string_start is not None:
+                    size = match.start() - self._string_start - 1
+                    self._last_key = bytes(buffer[self._string_start + 1:match.start()]) if size <= _MAX_KEY_SIZE else None
+                    self._string_start = None
+                continue
+
+            match = _STRUCTURE.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = buffer[match.start()]
+            pos = match.end()
+            if char == 0x22:
+                self._in_string = True
+                if self._depth == 1 and self._active is None:
+                    self._string_start = match.start()
+            elif char in (0x7B, 0x5B):
+                if self._active is not None and self._depth == self._element_depth:
+                    self._element_start = match.start()
+                    self._scalar_start = None
+                elif char == 0x5B and self._active is None and self._is_target():
+                    self._active = self._last_key if self.keys is not None else b""
+                    self._element_depth = self._depth + 1
+                    self._scalar_start = pos
+                self._depth += 1
+            elif char == 0x2C:
+                if self._active is not None and self._depth == self._element_depth:
+                    self._emit_scalar(buffer, match.start(), elements)
+                    self._scalar_start = pos
+            else:
+                self._depth -= 1
+                if self._active is not None:
+                    if self._depth == self._element_depth and self._element_start is not None:
+                        key = self._active.decode() if self.keys is not None else None
+                        elements.append((key, bytes(buffer[self._element_start:pos])))
+                        self._element_start = None
+                    elif self._depth < self._element_depth:
+                        self._emit_scalar(buffer, match.start(), elements)
+                        self._active = None
+                        self._last_key = None
+
+        keep = pos
+        if self._element_start is not None:
+            keep = min(keep, self._element_start)
+        if self._string_start is not None:
+            keep = min(keep, self._string_start)
+        if self._scalar_start is not None:
+            keep = min(keep, self._scalar_start)
+        if keep:
+            del buffer[:keep]
+            pos -= keep
+            if self._element_start is not None:
+                self._element_start -= keep
+            if self._string_start is not None:
+                self._string_start -= keep
+            if self._scalar_start is not None:
+                self._scalar_start -= keep
+        self._pos = pos
+        return elements
+
+    def _emit_scalar(self, buffer: bytearray, end: int, elements: List[Tuple[Optional[str], bytes]]) -> None:
+        if self._scalar_start is not None:
+            value = bytes(buffer[self._scalar_start:end]).strip()
+            if value:
+                elements.append((self._active.decode() if self.keys is not None else None, value))
+            self._scalar_start = None
+
+    def _is_target(self) -> bool:
+        if self.keys is None:
+            return self._depth == 0
+        return self._depth == 1 and self._last_key in self.keys
@@ -1,7 +1,12 @@
+import asyncio
+import contextlib
 import datetime
+import inspect
+import os
+import time
 import orjson
 import aiohttp
-from typing import List, Optional, Union, Literal, Dict, Any
+from typing import List, Optional, Union, Literal, Dict, Any, AsyncIterator, Tuple, BinaryIO
 from pydantic import TypeAdapter
 
 from .models import (ServerStatusResponse, RatingResponse, CheckRpResponse, RpNickResponse, EstateResponse, MembersResponse,
@@ -24,17 +29,32 @@ from .models import (ServerStatusResponse, RatingResponse, CheckRpResponse, RpNi
                      MarketplaceContactClickRequest, MarketplaceFavoriteRequest, MarketplaceListingActionRequest, MarketplaceListingResponse,
                      MarketplaceListingDeleteRequest, MarketplaceListingsResponse, MarketplaceModerationListResponse, MarketplaceModerationRequest, MarketplaceMyListingsResponse,
                      MarketplacePromoteRequest, MarketplacePromoteResponse, MarketplaceSimilarResponse, MarketplaceUserListingCreateRequest,
-                     MarketplaceUserListingPatchRequest)
+                     MarketplaceUserListingPatchRequest, ShopEntry, ItemEntry, HouseEntry, BusinessEntry)
 from .api import VprikolAPIError
+from .cassette import Cassette
+from .json_stream import JsonArrayScanner
+from .transport import AiohttpTransport, Transport
+from .metrics import RequestMetrics, RequestTrace, instrumented, record_request, trace_configs
 
+ScreenSource = Union[bytes, bytearray, memoryview, str, os.PathLike, BinaryIO]
 
+_MIN_ESTATE_SHARD_SIZE = 50
+_MAX_ESTATE_SHARD_SIZE = 5000
+_TARGET_ESTATE_SHARD_ENTRIES = 500
+
+
+@instrumented
 class VprikolAPI:
-    def __init__(self, token: Optional[str] = None, base_url: str = "https://api.szx.su/"):
+    def __init__(self, token: Optional[str] = None, base_url: str = "https://api.szx.su/",
+                 metrics: Optional[RequestMetrics] = None, cassette: Optional[Cassette] = None,
+                 transport: Optional[Transport] = None):
         self.base_url = base_url
+        self.metrics = metrics
+        self.cassette = cassette
         self.headers = {"User-Agent": "vprikol-python-lib-6.3.49-release"}
         if token:
             self.headers["VP-API-Token"] = token
-        self._session: Optional[aiohttp.ClientSession] = None
+        self.transport: Transport = transport or AiohttpTransport(self.headers, trace_configs=trace_configs(metrics))
 
     async def __aenter__(self):
         await self.create_session()
@@ -44,47 +64,115 @@ class VprikolAPI:
         await self.close()
 
     async def create_session(self):
-        if self._session and not self._session.closed:
-            return
-
-        self._session = aiohttp.ClientSession(headers=self.headers, json_serialize=lambda x: orjson.dumps(x).decode())
+        await self.transport.open()
 
     async def close(self):
-        if self._session and not self._session.closed:
-            await self._session.close()
+        await self.transport.close()
 
     @staticmethod
-    async def _make_request(session: aiohttp.ClientSession, method: str, url: str,
-                            params: Optional[Dict[str, Any]], json_body: Any, data: Any) -> Any:
-        async with session.request(method, url, params=params, json=json_body, data=data) as response:
-            if 200 <= response.status < 300:
-                if response.status == 204:
-                    return None
-                if response.content_type == "application/json":
-                    return await response.json()
-                return await response.read()
-
-            if response.content_type == "application/json":
-                error_data = await response.json()
-            else:
-                error_data = {"detail": f"Необработанное исключение #{response.status}", "status_code": response.status}
-            raise VprikolAPIError(status_code=response.status, error_data=error_data)
+    def _parse_response(status: int, content_type: str, body: bytes) -> Any:
+        if 200 <= status < 300:
+            if status == 204:
+                return None
+            if content_type == "application/json":
+                return orjson.loads(body)
+            return body
+
+        if content_type == "application/json":
+            error_data = orjson.loads(body)
+        else:
+            error_data = {"detail": f"Необработанное исключение #{status}", "status_code": status}
+        raise VprikolAPIError(status_code=status, error_data=error_data)
 
     async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
-                       json_body: Any = None, data: Any = None) -> Any:
-        url = f"{self.base_url}{path}"
-
+                       json_body: Any = None, data: Any = None, api_method: Optional[str] = None) -> Any:
         cleaned_params = {}
         if params:
             for k, v in params.items():
                 if v is not None:
                     cleaned_params[k] = v
 
-        if self._session and not self._session.closed:
-            return await self._make_request(self._session, method, url, cleaned_params, json_body, data)
+        if self.metrics is None:
+            return await self._send(method, path, cleaned_params, json_body, data)
+
+        bytes_out = len(orjson.dumps(json_body)) if json_body is not None else \
+            len(data) if isinstance(data, (bytes, bytearray)) else 0
+        trace = RequestTrace(path, bytes_out)
+        try:
+            response = await self._send(method, path, cleaned_params, json_body, data, trace)
+        except BaseException as e:
+            trace.finish(e)
+            raise
         else:
-            async with aiohttp.ClientSession(headers=self.headers, json_serialize=lambda x: orjson.dumps(x).decode()) as session:
-                return await self._make_request(session, method, url, cleaned_params, json_body, data)
+            trace.finish()
+            return response
+        finally:
+            record_request(self.metrics, type(self).__name__, trace, api_method)
+
+    async def _send(self, method: str, path: str, params: Dict[str, Any], json_body: Any, data: Any,
+                    trace: Optional[RequestTrace] = None) -> Any:
+        if self.cassette is not None:
+            played = await self.cassette.play(method, path, params, json_body, data)
+            if played is not None:
+                if trace is not None:
+                    trace.headers_received(played[0])
+                    trace.body_received(len(played[2]))
+                return self._parse_response(*played)
+
+        url = f"{self.base_url}{path}"
+        started = time.perf_counter()
+        status, content_type, body = await self.transport.request(method, url, params, json_body, data, trace)
+        if self.cassette is not None:
+            self.cassette.record(method, path, params, json_body, data, status, content_type, body,
+                                 time.perf_counter() - started)
+        return self._parse_response(status, content_type, body)
+
+    async def _stream(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      keys: Optional[List[str]] = None,
+                      api_method: Optional[str] = None) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        if self.cassette is not None:
+            response = await self._request(method, path, params=params, api_method=api_method)
+            for key in keys or [None]:
+                for element in (response.get(key, []) if key is not None else response):
+                    yield key, element
+            return
+
+        scanner = JsonArrayScanner(keys)
+        async for chunk in self._iter_body(method, path, params=params, api_method=api_method):
+            for element in scanner.feed(chunk):
+                yield element
+
+    async def _iter_body(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                         data: Any = None, api_method: Optional[str] = None) -> AsyncIterator[bytes]:
+        if self.cassette is not None:
+            yield await self._request(method, path, params=params, data=data, api_method=api_method)
+            return
+
+        cleaned_params = {k: v for k, v in (params or {}).items() if v is not None}
+        trace = RequestTrace(path) if self.metrics is not None else None
+        try:
+            async with self.transport.stream(method, f"{self.base_url}{path}", cleaned_params, None, data,
+                                             trace) as response:
+                if not 200 <= response.status < 300:
+                    body = b"".join([chunk async for chunk in response.chunks])
+                    self._parse_response(response.status, response.content_type, body)
+                async for chunk in response.chunks:
+                    yield chunk
+        except Exception as e:
+            if trace is not None:
+                trace.finish(e)
+            raise
+        finally:
+            if trace is not None:
+                if not trace.finished:
+                    trace.finish()
+                record_request(self.metrics, type(self).__name__, trace, api_method)
+
+    @staticmethod
+    def _validate_element(model, element: Any):
+        if isinstance(element, bytes):
+            return model.model_validate_json(element)
+        return model.model_validate(element)
 
     async def get_token_info(self, token_id: Optional[int] = None) -> TokenResponse:
         params = {"token_id": str(token_id)} if token_id else None
@@ -222,6 +310,76 @@ class VprikolAPI:
         response = await self._request("GET", "estate", params=params)
         return EstateResponse.model_validate(response)
 
+    async def iter_estate(self, server_id: int, estate_type: Optional[EstateType] = None, nickname: Optional[str] = None,
+                          min_id: Optional[int] = None, max_id: Optional[int] = None) -> AsyncIterator[Union[HouseEntry, BusinessEntry]]:
+        params = {
+            "server_id": str(server_id),
+            "type": estate_type.value if estate_type else None,
+            "nickname": nickname,
+            "min_id": str(min_id) if min_id is not None else None,
+            "max_id": str(max_id) if max_id is not None else None
+        }
+        async for key, element in self._stream("GET", "estate", params=params, keys=["houses", "businesses"],
+                                               api_method="iter_estate"):
+            yield self._validate_element(HouseEntry if key == "houses" else BusinessEntry, element)
+
+    async def iter_estate_shards(self, server_id: int, estate_type: Optional[EstateType] = None, nickname: Optional[str] = None,
+                                 min_id: int = 0, max_id: Optional[int] = None, shard_size: int = 250, concurrency: int = 4,
+                                 max_gap: int = 1000, target_latency: float = 0.5) -> AsyncIterator[EstateResponse]:
+        cursor = min_id
+        last_filled_id = min_id - 1
+        pending = set()
+        try:
+            while True:
+                while len(pending) < concurrency and cursor <= (max_id if max_id is not None else last_filled_id + max_gap):
+                    shard_max_id = cursor + shard_size - 1 if max_id is None else min(cursor + shard_size - 1, max_id)
+                    pending.add(asyncio.ensure_future(self._get_estate_shard(server_id, estate_type, nickname, cursor, shard_max_id)))
+                    cursor = shard_max_id + 1
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    shard, elapsed, size = task.result()
+                    ids = [house.id for house in shard.houses] + [business.id for business in shard.businesses]
+                    if ids:
+                        last_filled_id = max(last_filled_id, max(ids))
+                    ratio = target_latency / max(elapsed, 0.001)
+                    if ids:
+                        ratio = min(ratio, _TARGET_ESTATE_SHARD_ENTRIES / len(ids))
+                    shard_size = int(size * min(2.0, max(0.5, ratio)))
+                    shard_size = max(_MIN_ESTATE_SHARD_SIZE, min(_MAX_ESTATE_SHARD_SIZE, shard_size))
+                    yield shard
+
+            if max_id is None:
+                tail, _, _ = await self._get_estate_shard(server_id, estate_type, nickname, cursor, None)
+                if tail.houses or tail.businesses:
+                    yield tail
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_estate_sharded(self, server_id: int, estate_type: Optional[EstateType] = None, nickname: Optional[str] = None,
+                                 min_id: int = 0, max_id: Optional[int] = None, shard_size: int = 250, concurrency: int = 4,
+                                 max_gap: int = 1000, target_latency: float = 0.5) -> EstateResponse:
+        shards = [shard async for shard in self.iter_estate_shards(server_id, estate_type, nickname, min_id, max_id,
+                                                                   shard_size, concurrency, max_gap, target_latency)]
+        if not any(shard.houses or shard.businesses for shard in shards):
+            return await self.get_estate(server_id, estate_type, nickname, min_id, max_id)
+        return EstateResponse(
+            server_id=shards[0].server_id,
+            server_label=shards[0].server_label,
+            updated_at=max(shard.updated_at for shard in shards),
+            houses=sorted((house for shard in shards for house in shard.houses), key=lambda house: house.id),
+            businesses=sorted((business for shard in shards for business in shard.businesses), key=lambda business: business.id)
+        )
+
+    async def _get_estate_shard(self, server_id: int, estate_type: Optional[EstateType], nickname: Optional[str],
+                                min_id: int, max_id: Optional[int]) -> Tuple[EstateResponse, float, int]:
+        started = time.perf_counter()
+        shard = await self.get_estate(server_id, estate_type, nickname, min_id, max_id)
+        return shard, time.perf_counter() - started, (max_id - min_id + 1) if max_id is not None else 0
+
     async def check_rp_nickname(self, first_name: Optional[str] = None, last_name: Optional[str] = None) -> CheckRpResponse:
         params = {"first_name": first_name, "last_name": last_name}
         response = await self._request("GET", "checkrp", params=params)
@@ -232,8 +390,44 @@ class VprikolAPI:
         response = await self._request("GET", "rpnick", params=params)
         return RpNickResponse.model_validate(response)
 
-    async def generate_ss(self, screen: bytes, commands: List[str], text_top: bool = True, font: SSFont = SSFont.ARIAL_BOLD,
+    async def generate_ss(self, screen: ScreenSource, commands: List[str], text_top: bool = True, font: SSFont = SSFont.ARIAL_BOLD,
                           text_size: float = 0.95, commands_colors: Optional[Dict[str, str]] = None) -> bytes:
+        with contextlib.ExitStack() as stack:
+            form_data = self._ss_form(stack, screen, commands, text_top, font, text_size, commands_colors)
+            return await self._request("POST", "ss", data=form_data)
+
+    async def generate_ss_to(self, destination: Union[str, os.PathLike, Any], screen: ScreenSource, commands: List[str],
+                             text_top: bool = True, font: SSFont = SSFont.ARIAL_BOLD, text_size: float = 0.95,
+                             commands_colors: Optional[Dict[str, str]] = None) -> int:
+        path = os.fspath(destination) if isinstance(destination, (str, os.PathLike)) else None
+        written = 0
+        with contextlib.ExitStack() as stack:
+            form_data = self._ss_form(stack, screen, commands, text_top, font, text_size, commands_colors)
+            if path is not None:
+                destination = stack.enter_context(open(f"{path}.tmp", "wb"))
+            try:
+                async for chunk in self._iter_body("POST", "ss", data=form_data):
+                    result = destination.write(chunk)
+                    if inspect.isawaitable(result):
+                        await result
+                    drain = getattr(destination, "drain", None)
+                    if drain is not None:
+                        await drain()
+                    written += len(chunk)
+            except BaseException:
+                if path is not None:
+                    destination.close()
+                    os.remove(f"{path}.tmp")
+                raise
+        if path is not None:
+            os.replace(f"{path}.tmp", path)
+        return written
+
+    @staticmethod
+    def _ss_form(stack: contextlib.ExitStack, screen: ScreenSource, commands: List[str], text_top: bool, font: SSFont,
+                 text_size: float, commands_colors: Optional[Dict[str, str]]) -> aiohttp.FormData:
+        if isinstance(screen, (str, os.PathLike)):
+            screen = stack.enter_context(open(screen, "rb"))
         form_data = aiohttp.FormData()
         form_data.add_field("screen", screen, filename="screen.png", content_type="image/png")
         for command in commands:
@@ -242,8 +436,7 @@ class VprikolAPI:
         form_data.add_field("font", font.value)
         form_data.add_field("text_size", str(text_size))
         form_data.add_field("commands_colors", orjson.dumps(commands_colors).decode() if commands_colors else "{}")
-
-        return await self._request("POST", "ss", data=form_data)
+        return form_data
 
     async def generate_ai_situation(self, theme_prompt: str, executor_id: int, platform: str) -> AIResponse:
         params = {
@@ -270,9 +463,11 @@ class VprikolAPI:
         response = await self._request("GET", "ingame/players", params={"server_id": str(server_id)})
         return PlayersResponse.model_validate(response)
 
-    async def get_server_map(self, server_id: int, only_ghetto: bool = False) -> MapResponse:
+    async def get_server_map(self, server_id: int, only_ghetto: bool = False, include_image: bool = True) -> MapResponse:
         params = {"server_id": str(server_id), "only_ghetto": str(only_ghetto).lower()}
         response = await self._request("GET", "ingame/map", params=params)
+        if not include_image:
+            response.pop("image", None)
         return MapResponse.model_validate(response)
 
     async def find_player(self, server_id: int, nickname: Optional[str] = None, account_id: Optional[int] = None,
@@ -672,6 +867,24 @@ class VprikolAPI:
         response = await self._request("GET", "items/list", params=params)
         return ItemsResponse.model_validate(response)
 
+    async def iter_items(self, item_type: Optional[int] = None, name: Optional[str] = None,
+                         skin_id: Optional[int] = None, availability: Optional[Literal["tradeable", "rentable"]] = None,
+                         server_id: Optional[int] = None, period: Literal['1d', '1w', '1m', '3m', '6m', '1y'] = '1m',
+                         limit: int = 50, offset: int = 0) -> AsyncIterator[ItemEntry]:
+        params = {
+            "item_type": str(item_type) if item_type is not None else None,
+            "name": name,
+            "skin_id": str(skin_id) if skin_id is not None else None,
+            "availability": availability,
+            "server_id": str(server_id) if server_id is not None else None,
+            "period": period,
+            "limit": str(limit),
+            "offset": str(offset)
+        }
+        async for _, element in self._stream("GET", "items/list", params=params, keys=["items"],
+                                             api_method="iter_items"):
+            yield self._validate_element(ItemEntry, element)
+
     async def get_ghetto_rating(self, server_id: int) -> GhettoRatingResponse:
         response = await self._request("GET", "ingame/ghetto/rating", params={"server_id": str(server_id)})
         return GhettoRatingResponse.model_validate(response)
@@ -705,6 +918,24 @@ class VprikolAPI:
         response = await self._request("GET", "items/shops", params=params)
         return ShopsResponse.model_validate(response)
 
+    async def iter_shops(self, server_id: Optional[int] = None, nickname: Optional[str] = None,
+                         item_id: Optional[int] = None, min_price: Optional[int] = None,
+                         max_price: Optional[int] = None, type: Optional[str] = None,
+                         limit: int = 50, offset: int = 0) -> AsyncIterator[ShopEntry]:
+        params = {
+            "server_id": str(server_id) if server_id is not None else None,
+            "nickname": nickname,
+            "item_id": str(item_id) if item_id is not None else None,
+            "min_price": str(min_price) if min_price is not None else None,
+            "max_price": str(max_price) if max_price is not None else None,
+            "type": type,
+            "limit": str(limit),
+            "offset": str(offset)
+        }
+        async for _, element in self._stream("GET", "items/shops", params=params, keys=["shops"],
+                                             api_method="iter_shops"):
+            yield self._validate_element(ShopEntry, element)
+
     async def get_shop_deals(self, server_id: int, item_id: Optional[int] = None,
                              mod_level: Optional[int] = None, include_modded: bool = True,
                              min_profit: int = 0, min_discount: int = 0,
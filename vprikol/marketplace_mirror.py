@@ -0,0 +1,179 @@
+import bisect
+import datetime
+from typing import Any, Dict, Iterable, List, Literal, Optional, Set, Tuple
+
+from .item_search import normalize
+from .main import VprikolAPI
+from .models import (MarketplaceExternalOwner, MarketplaceExternalSimilarListing, MarketplaceListing,
+                     MarketplaceSimilarResponse)
+
+_INDEXED_FIELDS = ("server_id", "source", "object_type", "deal_type", "category_id")
+_OLDEST = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+
+
+def _moment(value: Optional[datetime.datetime]) -> datetime.datetime:
+    if value is None:
+        return _OLDEST
+    return value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc)
+
+
+def _discard(index: Dict[Any, Set[str]], key: Any, target_key: str) -> bool:
+    # Drops the entry once its last key is gone, so indexes don't accumulate empty sets.
+    keys = index.get(key)
+    if keys is None:
+        return False
+    keys.discard(target_key)
+    if keys:
+        return False
+    del index[key]
+    return True
+
+
+class MarketplaceMirror:
+    def __init__(self, page_size: int = 50):
+        self.page_size = page_size
+        self._listings: Dict[str, MarketplaceListing] = {}
+        self._fields: Dict[Tuple[str, object], Set[str]] = {}
+        self._words: Dict[str, Set[str]] = {}
+        self._item_ids: Dict[int, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_sorted = True
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    async def sync(self, api: VprikolAPI, server_id: Optional[int] = None) -> int:
+        listings: List[MarketplaceListing] = []
+        while True:
+            page = await api.get_marketplace_listings(server_id=server_id, sort="new", limit=self.page_size,
+                                                      offset=len(listings))
+            listings.extend(page.listings)
+            if not page.listings or len(listings) >= page.total:
+                break
+
+        fetched = {listing.target_key for listing in listings}
+        stale = [key for key, listing in self._listings.items()
+                 if key not in fetched and (server_id is None or listing.server_id == server_id)]
+        for key in stale:
+            self.remove(key)
+        self.update(listings)
+        return len(listings)
+
+    def update(self, listings: Iterable[MarketplaceListing]) -> None:
+        for listing in listings:
+            self.remove(listing.target_key)
+            self._listings[listing.target_key] = listing
+            for field in _INDEXED_FIELDS:
+                self._fields.setdefault((field, getattr(listing, field)), set()).add(listing.target_key)
+            for word in self._listing_words(listing):
+                keys = self._words.get(word)
+                if keys is None:
+                    keys = self._words[word] = set()
+                    self._vocabulary_sorted = False
+                keys.add(listing.target_key)
+            for item in listing.items:
+                self._item_ids.setdefault(item.item_id, set()).add(listing.target_key)
+
+    def remove(self, target_key: str) -> None:
+        listing = self._listings.pop(target_key, None)
+        if listing is None:
+            return
+        for field in _INDEXED_FIELDS:
+            _discard(self._fields, (field, getattr(listing, field)), target_key)
+        for word in self._listing_words(listing):
+            if _discard(self._words, word, target_key):
+                self._vocabulary_sorted = False
+        for item in listing.items:
+            _discard(self._item_ids, item.item_id, target_key)
+
+    def get(self, target_key: str) -> Optional[MarketplaceListing]:
+        return self._listings.get(target_key)
+
+    def query(self, server_id: Optional[int] = None, source: Optional[Literal["external", "user"]] = None,
+              q: Optional[str] = None, object_type: Optional[str] = None, deal_type: Optional[str] = None,
+              category_id: Optional[int] = None, min_price: Optional[int] = None, max_price: Optional[int] = None,
+              sort: Literal["smart", "new", "price", "price_desc", "bumped"] = "smart",
+              limit: int = 50, offset: int = 0) -> List[MarketplaceListing]:
+        filters = {"server_id": server_id, "source": source, "object_type": object_type,
+                   "deal_type": deal_type, "category_id": category_id}
+        candidates = [self._fields.get((field, value), set()) for field, value in filters.items() if value is not None]
+        if q:
+            candidates.append(self._search(q))
+
+        if candidates:
+            candidates.sort(key=len)
+            keys = set(candidates[0]).intersection(*candidates[1:])
+        else:
+            keys = set(self._listings)
+
+        listings = [listing for listing in map(self._listings.__getitem__, keys)
+                    if (min_price is None or (listing.price is not None and listing.price >= min_price))
+                    and (max_price is None or (listing.price is not None and listing.price <= max_price))]
+        listings.sort(key=self._sort_key(sort))
+        return listings[offset:offset + limit]
+
+    def count(self, **filters) -> int:
+        return len(self.query(limit=len(self._listings), **filters))
+
+    def get_similar(self, server_id: int, q: Optional[str] = None, item_id: Optional[int] = None,
+                    category_id: Optional[int] = None, limit: int = 8) -> MarketplaceSimilarResponse:
+        keys = self._fields.get(("server_id", server_id), set()) & self._fields.get(("source", "external"), set())
+        keys = {key for key in keys if self._listings[key].external_list_uid is not None}
+        if item_id is not None:
+            keys &= self._item_ids.get(item_id, set())
+        if category_id is not None:
+            keys &= self._fields.get(("category_id", category_id), set())
+
+        scores: Dict[str, int] = {key: 0 for key in keys}
+        if q:
+            for word in normalize(q).split():
+                for key in self._words.get(word, set()) & keys:
+                    scores[key] += 1
+            if item_id is None and category_id is None:
+                scores = {key: score for key, score in scores.items() if score}
+        smart = self._sort_key("smart")
+        listings = sorted((self._listings[key] for key in scores),
+                          key=lambda listing: (-scores[listing.target_key], smart(listing)))[:limit]
+        return MarketplaceSimilarResponse(listings=[
+            MarketplaceExternalSimilarListing(
+                uid=listing.external_list_uid, label=listing.title, category_name=listing.category_name,
+                cost_per_hour=listing.price, items=listing.items,
+                owner=MarketplaceExternalOwner(nickname=listing.owner_nickname) if listing.owner_nickname else None)
+            for listing in listings])
+
+    def _search(self, q: str) -> Set[str]:
+        words = normalize(q).split()
+        if not words:
+            return set(self._listings)
+        *exact, last = words
+        if not self._vocabulary_sorted:
+            self._vocabulary = sorted(self._words)
+            self._vocabulary_sorted = True
+
+        matched: Set[str] = set()
+        index = bisect.bisect_left(self._vocabulary, last)
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(last):
+            matched |= self._words[self._vocabulary[index]]
+            index += 1
+        for word in exact:
+            matched &= self._words.get(word, set())
+        return matched
+
+    @staticmethod
+    def _listing_words(listing: MarketplaceListing) -> Set[str]:
+        text = " ".join([listing.title, listing.description, listing.category_name or "", listing.owner_nickname or ""]
+                        + [item.name for item in listing.items])
+        return set(normalize(text).split())
+
+    @staticmethod
+    def _sort_key(sort: str):
+        if sort == "new":
+            return lambda listing: (-_moment(listing.published_at or listing.created_at).timestamp(),)
+        if sort == "price":
+            return lambda listing: (listing.price is None, listing.price or 0)
+        if sort == "price_desc":
+            return lambda listing: (listing.price is None, -(listing.price or 0))
+        if sort == "bumped":
+            return lambda listing: (-_moment(listing.bumped_at or listing.published_at or listing.created_at).timestamp(),)
+        return lambda listing: (not listing.is_promoted, -_moment(listing.promoted_at).timestamp(),
+                                -_moment(listing.bumped_at or listing.published_at or listing.created_at).timestamp())
@@ -0,0 +1,337 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import time
+import aiohttp
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+_SKIPPED_METHODS = {"create_session", "close"}
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - (seen - count)) / count
+        return self.bounds[-1]
+
+
+class RequestTrace:
+    __slots__ = ("path", "status", "bytes_out", "bytes_in", "started", "headers_at", "body_at", "finished", "error",
+                 "dns_time", "pool_wait_time", "connect_time", "redirect_time", "redirects", "reused",
+                 "_connect_started", "_phase_started")
+
+    def __init__(self, path: str, bytes_out: int = 0):
+        self.path = path
+        self.status = 0
+        self.bytes_out = bytes_out
+        self.bytes_in = 0
+        self.started = time.perf_counter()
+        self.headers_at = 0.0
+        self.body_at = 0.0
+        self.finished = 0.0
+        self.error: Optional[str] = None
+        self.dns_time: Optional[float] = None
+        self.pool_wait_time: Optional[float] = None
+        self.connect_time: Optional[float] = None
+        self.redirect_time = 0.0
+        self.redirects = 0
+        self.reused: Optional[bool] = None
+        self._connect_started = 0.0
+        self._phase_started = 0.0
+
+    def headers_received(self, status: int) -> None:
+        self.status = status
+        self.headers_at = time.perf_counter()
+
+    def body_received(self, size: int) -> None:
+        self.bytes_in = size
+        self.body_at = time.perf_counter()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.finished = time.perf_counter()
+        if error is not None:
+            self.error = type(error).__name__
+
+    @property
+    def ttfb(self) -> float:
+        return self.headers_at - self.started if self.headers_at else 0.0
+
+    @property
+    def read_time(self) -> float:
+        return self.body_at - self.headers_at if self.body_at else 0.0
+
+    @property
+    def decode_time(self) -> float:
+        return self.finished - self.body_at if self.body_at else 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+class MethodSample(NamedTuple):
+    client: str
+    method: str
+    duration: float
+    validation_time: float
+    requests: Tuple[RequestTrace, ...]
+
+
+class MethodStats:
+    __slots__ = ("calls", "errors", "statuses", "bytes_in", "bytes_out", "reused_connections", "new_connections",
+                 "redirects", "duration", "ttfb", "read", "decode", "validation", "dns", "pool_wait", "connect")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.reused_connections = 0
+        self.new_connections = 0
+        self.redirects = 0
+        self.duration = Histogram()
+        self.ttfb = Histogram()
+        self.read = Histogram()
+        self.decode = Histogram()
+        self.validation = Histogram()
+        self.dns = Histogram()
+        self.pool_wait = Histogram()
+        self.connect = Histogram()
+
+    @property
+    def connection_reuse_ratio(self) -> Optional[float]:
+        total = self.reused_connections + self.new_connections
+        return self.reused_connections / total if total else None
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], MethodStats] = {}
+        self._exporters: List[Callable[[MethodSample], None]] = []
+
+    def add_exporter(self, exporter: Callable[[MethodSample], None]) -> None:
+        self._exporters.append(exporter)
+
+    def remove_exporter(self, exporter: Callable[[MethodSample], None]) -> None:
+        self._exporters.remove(exporter)
+
+    def get_stats(self, client: str, method: str) -> Optional[MethodStats]:
+        return self._stats.get((client, method))
+
+    def get_connection_reuse_ratio(self, client: Optional[str] = None) -> Optional[float]:
+        reused = created = 0
+        for (stats_client, _), stats in self._stats.items():
+            if client is None or stats_client == client:
+                reused += stats.reused_connections
+                created += stats.new_connections
+        return reused / (reused + created) if reused + created else None
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def observe(self, sample: MethodSample) -> None:
+        stats = self._stats.get((sample.client, sample.method))
+        if stats is None:
+            stats = self._stats[(sample.client, sample.method)] = MethodStats()
+        stats.calls += 1
+        stats.duration.observe(sample.duration)
+        if sample.requests:
+            stats.validation.observe(sample.validation_time)
+        for trace in sample.requests:
+            if trace.error is not None and not trace.status:
+                stats.errors += 1
+            else:
+                stats.statuses[trace.status] = stats.statuses.get(trace.status, 0) + 1
+            stats.bytes_in += trace.bytes_in
+            stats.bytes_out += trace.bytes_out
+            if trace.headers_at:
+                stats.ttfb.observe(trace.ttfb)
+            if trace.body_at:
+                stats.read.observe(trace.read_time)
+                stats.decode.observe(trace.decode_time)
+            if trace.reused is not None:
+                if trace.reused:
+                    stats.reused_connections += 1
+                else:
+                    stats.new_connections += 1
+            if trace.dns_time is not None:
+                stats.dns.observe(trace.dns_time)
+            if trace.pool_wait_time is not None:
+                stats.pool_wait.observe(trace.pool_wait_time)
+            if trace.connect_time is not None:
+                stats.connect.observe(trace.connect_time)
+            stats.redirects += trace.redirects
+        for exporter in self._exporters:
+            exporter(sample)
+
+    def to_prometheus(self, prefix: str = "vprikol") -> str:
+        counters = {name: [] for name in ("calls", "responses", "transport_errors", "received_bytes", "sent_bytes",
+                                          "reused_connections", "new_connections", "redirects")}
+        histograms = {name: [] for name in ("duration", "ttfb", "read", "decode", "validation", "dns", "pool_wait",
+                                            "connect")}
+        for (client, method), stats in sorted(self._stats.items()):
+            labels = f'client="{client}",method="{_escape(method)}"'
+            counters["calls"].append(f"{{{labels}}} {stats.calls}")
+            for status, count in sorted(stats.statuses.items()):
+                counters["responses"].append(f'{{{labels},status="{status}"}} {count}')
+            counters["transport_errors"].append(f"{{{labels}}} {stats.errors}")
+            counters["received_bytes"].append(f"{{{labels}}} {stats.bytes_in}")
+            counters["sent_bytes"].append(f"{{{labels}}} {stats.bytes_out}")
+            for name in ("reused_connections", "new_connections", "redirects"):
+                counters[name].append(f"{{{labels}}} {getattr(stats, name)}")
+            for name, output in histograms.items():
+                histogram: Histogram = getattr(stats, name)
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    output.append(f'_bucket{{{labels},le="{bound}"}} {cumulative}')
+                output.append(f'_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                output.append(f"_sum{{{labels}}} {histogram.sum}")
+                output.append(f"_count{{{labels}}} {histogram.count}")
+
+        lines = []
+        for name, samples in counters.items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.extend(f"{prefix}_{name}_total{sample}" for sample in samples)
+        for name, samples in histograms.items():
+            lines.append(f"# TYPE {prefix}_{name}_seconds histogram")
+            lines.extend(f"{prefix}_{name}_seconds{sample}" for sample in samples)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+async def _on_connection_queued_start(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx._phase_started = time.perf_counter()
+
+
+async def _on_connection_queued_end(session, context, params) -> None:
+    trace: Optional[RequestTrace] = context.trace_request_ctx
+    if trace is not None:
+        trace.pool_wait_time = (trace.pool_wait_time or 0.0) + time.perf_counter() - trace._phase_started
+
+
+async def _on_connection_create_start(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx._connect_started = time.perf_counter()
+
+
+async def _on_connection_create_end(session, context, params) -> None:
+    trace: Optional[RequestTrace] = context.trace_request_ctx
+    if trace is not None:
+        trace.connect_time = time.perf_counter() - trace._connect_started
+        trace.reused = False
+
+
+async def _on_connection_reuseconn(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx.reused = True
+
+
+async def _on_dns_resolvehost_start(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx._phase_started = time.perf_counter()
+
+
+async def _on_dns_resolvehost_end(session, context, params) -> None:
+    trace: Optional[RequestTrace] = context.trace_request_ctx
+    if trace is not None:
+        trace.dns_time = time.perf_counter() - trace._phase_started
+
+
+async def _on_dns_cache_hit(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx.dns_time = 0.0
+
+
+async def _on_request_redirect(session, context, params) -> None:
+    trace: Optional[RequestTrace] = context.trace_request_ctx
+    if trace is not None:
+        trace.redirects += 1
+        trace.redirect_time = time.perf_counter() - trace.started
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_queued_start.append(_on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(_on_connection_queued_end)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    trace_config.on_dns_cache_hit.append(_on_dns_cache_hit)
+    trace_config.on_request_redirect.append(_on_request_redirect)
+    return trace_config
+
+
+def trace_configs(metrics: Optional[RequestMetrics]) -> Optional[List[aiohttp.TraceConfig]]:
+    return [create_trace_config()] if metrics is not None else None
+
+
+_current_call = contextvars.ContextVar("vprikol_call", default=None)
+
+
+def record_request(metrics: RequestMetrics, client: str, trace: RequestTrace, api_method: Optional[str] = None) -> None:
+    traces = _current_call.get()
+    if traces is not None:
+        traces.append(trace)
+    else:
+        metrics.observe(MethodSample(client, api_method or trace.path, trace.duration, 0.0, (trace,)))
+
+
+def instrumented(cls):
+    client = cls.__name__
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or name in _SKIPPED_METHODS or not inspect.iscoroutinefunction(member):
+            continue
+        setattr(cls, name, _instrument(client, name, member))
+    return cls
+
+
+def _instrument(client: str, name: str, func):
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        metrics: Optional[RequestMetrics] = self.metrics
+        if metrics is None or _current_call.get() is not None:
+            return await func(self, *args, **kwargs)
+        traces: List[RequestTrace] = []
+        token = _current_call.set(traces)
+        started = time.perf_counter()
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            _current_call.reset(token)
+            duration = time.perf_counter() - started
+            if traces:
+                network = max(trace.finished for trace in traces) - min(trace.started for trace in traces)
+                metrics.observe(MethodSample(client, name, duration, max(duration - network, 0.0), tuple(traces)))
+    return wrapper
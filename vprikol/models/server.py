@@ -1,6 +1,10 @@
+import base64
 import datetime
+import os
+import tempfile
+import weakref
 from typing import List, Optional, Any
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr, field_serializer
 from .base import RatingType, EstateHistoryType
 
 
@@ -139,13 +143,78 @@ class TerritoriesCount(BaseModel):
     nw: int = 0
 
 
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# The spilled file is never written after creation, so copies of a MapResponse share it and it is removed
+# once the last of them drops its reference.
+class _SpilledImage:
+    __slots__ = ("path", "_finalizer", "__weakref__")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    def __copy__(self) -> "_SpilledImage":
+        return self
+
+    def __deepcopy__(self, memo: Any) -> "_SpilledImage":
+        return self
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as file:
+            return file.read()
+
+
 class MapResponse(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
     server_id: int
     server_label: str
     updated_at: datetime.datetime
-    image: str = Field(..., alias="image")
+    image: Optional[str] = Field(None, alias="image", repr=False)
     territories_count: TerritoriesCount
+    _image_bytes: Optional[bytes] = PrivateAttr(None)
+    _image_file: Optional[_SpilledImage] = PrivateAttr(None)
+    _image_prefix: str = PrivateAttr("")
+
+    # Once decoded or spilled the base64 string is dropped from `image`; dumps re-encode it from the bytes.
+    @field_serializer("image")
+    def _serialize_image(self, image: Optional[str]) -> Optional[str]:
+        if image is None and (self._image_bytes is not None or self._image_file is not None):
+            return self._image_prefix + base64.b64encode(self.image_bytes).decode()
+        return image
+
+    @property
+    def image_bytes(self) -> Optional[bytes]:
+        if self._image_file is not None:
+            return self._image_file.read()
+        if self._image_bytes is None and self.image is not None:
+            head, separator, encoded = self.image.rpartition(",")
+            self._image_bytes = base64.b64decode(encoded)
+            self._image_prefix = head + separator
+            self.image = None
+        return self._image_bytes
+
+    def spill_image(self, directory: Optional[str] = None) -> Optional[str]:
+        if self._image_file is None:
+            data = self.image_bytes
+            if data is None:
+                return None
+            with tempfile.NamedTemporaryFile("wb", prefix="vprikol-map-", suffix=".png", dir=directory,
+                                             delete=False) as file:
+                file.write(data)
+            self._image_file = _SpilledImage(file.name)
+            self._image_bytes = None
+        return self._image_file.path
+
+    def release_image(self) -> None:
+        self._image_file = None
+        self._image_bytes = None
+        self.image = None
 
 
 class GraphPoint(BaseModel):
@@ -0,0 +1,210 @@
+import asyncio
+import inspect
+import time
+import aiohttp
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from pydantic import BaseModel
+
+from .api import VprikolAPIError
+from .main import VprikolAPI
+from .models import PlayerCommentResponse, PendingComplaintResponse
+
+ModerationItem = Union[PlayerCommentResponse, PendingComplaintResponse]
+ItemKey = Tuple[str, int]
+
+
+class ModerationDecision(BaseModel):
+    action: str
+    moderator_comment: Optional[str] = None
+
+
+ModerationRule = Callable[[ModerationItem], Union[Optional[ModerationDecision], Awaitable[Optional[ModerationDecision]]]]
+
+
+class ModerationStats(BaseModel):
+    fetched: int = 0
+    auto_decided: int = 0
+    moderated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    retries: int = 0
+    poll_errors: int = 0
+    queued: int = 0
+    undecided: int = 0
+    throughput: float = 0.0
+    queue_lag: float = 0.0
+    max_queue_lag: float = 0.0
+
+
+class ModerationPipeline:
+    def __init__(self, api: VprikolAPI, moderator_id: int, rules: Sequence[ModerationRule] = (),
+                 concurrency: int = 4, prefetch: int = 50, poll_interval: float = 5.0,
+                 max_retries: int = 3, retry_delay: float = 1.0):
+        self.api = api
+        self.moderator_id = moderator_id
+        self.rules = list(rules)
+        self.concurrency = concurrency
+        self.prefetch = prefetch
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.stats = ModerationStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._seen: Dict[ItemKey, ModerationItem] = {}
+        self._undecided: Dict[ItemKey, ModerationItem] = {}
+        self._in_flight: Dict[ItemKey, ModerationItem] = {}
+        self._started_at: Optional[float] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    def get_undecided(self) -> List[ModerationItem]:
+        return list(self._undecided.values())
+
+    def decide(self, item: ModerationItem, action: str, moderator_comment: Optional[str] = None) -> None:
+        key = self._key(item)
+        if key in self._in_flight:
+            return
+        self._undecided.pop(key, None)
+        self._seen[key] = item
+        self._enqueue(key, ModerationDecision(action=action, moderator_comment=moderator_comment))
+
+    async def run(self) -> None:
+        self._prepare()
+        self._stopped.clear()
+        self._started_at = self._started_at or time.monotonic()
+        workers = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+        try:
+            while not self._stopped.is_set():
+                try:
+                    await self.poll()
+                except Exception:
+                    self.stats.poll_errors += 1
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def poll(self) -> int:
+        self._prepare()
+        (comments, comments_complete), (complaints, complaints_complete) = await asyncio.gather(
+            self._fetch_pending(self.api.get_pending_comments, "comments"),
+            self._fetch_pending(self.api.get_pending_complaints, "complaints"))
+        items: List[ModerationItem] = comments + complaints
+        pending = {self._key(item) for item in items}
+        complete = {kind for kind, done in (("comment", comments_complete), ("complaint", complaints_complete)) if done}
+        for key in [key for key in self._seen
+                    if key[0] in complete and key not in pending and key not in self._in_flight]:
+            del self._seen[key]
+            self._undecided.pop(key, None)
+
+        new_items = 0
+        for item in items:
+            key = self._key(item)
+            if key in self._seen:
+                continue
+            self._seen[key] = item
+            new_items += 1
+            try:
+                decision = await self._apply_rules(item)
+            except Exception:
+                decision = None
+            if decision is None:
+                self._undecided[key] = item
+            else:
+                self.stats.auto_decided += 1
+                self._enqueue(key, decision)
+        self.stats.fetched += new_items
+        self.stats.undecided = len(self._undecided)
+        return new_items
+
+    async def _fetch_pending(self, fetch: Callable[..., Awaitable[BaseModel]],
+                             field: str) -> Tuple[List[ModerationItem], bool]:
+        items: List[ModerationItem] = []
+        offset = fresh = 0
+        while True:
+            page = getattr(await fetch(limit=self.prefetch, offset=offset), field)
+            items.extend(page)
+            fresh += sum(1 for item in page if self._key(item) not in self._seen)
+            offset += len(page)
+            if len(page) < self.prefetch:
+                return items, True
+            if fresh >= self.prefetch:
+                return items, False
+
+    async def _apply_rules(self, item: ModerationItem) -> Optional[ModerationDecision]:
+        for rule in self.rules:
+            decision = rule(item)
+            if inspect.isawaitable(decision):
+                decision = await decision
+            if decision is not None:
+                return decision
+        return None
+
+    def _prepare(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._stopped = asyncio.Event()
+
+    def _enqueue(self, key: ItemKey, decision: ModerationDecision) -> None:
+        self._prepare()
+        self._in_flight[key] = self._seen[key]
+        self._queue.put_nowait((key, decision, time.monotonic()))
+        self.stats.queued = self._queue.qsize()
+
+    async def _worker(self) -> None:
+        while True:
+            key, decision, enqueued_at = await self._queue.get()
+            lag = time.monotonic() - enqueued_at
+            self.stats.queue_lag = lag
+            self.stats.max_queue_lag = max(self.stats.max_queue_lag, lag)
+            self.stats.queued = self._queue.qsize()
+            handled = False
+            try:
+                handled = await self._moderate(key, decision)
+            finally:
+                self._in_flight.pop(key, None)
+                if not handled:
+                    self._seen.pop(key, None)
+                self._queue.task_done()
+                if self._started_at is not None:
+                    self.stats.throughput = self.stats.moderated / max(time.monotonic() - self._started_at, 0.001)
+
+    async def _moderate(self, key: ItemKey, decision: ModerationDecision) -> bool:
+        kind, item_id = key
+        for attempt in range(self.max_retries + 1):
+            try:
+                if kind == "comment":
+                    await self.api.moderate_comment(item_id, decision.action, self.moderator_id, decision.moderator_comment)
+                else:
+                    await self.api.moderate_complaint(item_id, decision.action, self.moderator_id)
+            except VprikolAPIError as e:
+                if e.status_code in (404, 409):
+                    self.stats.skipped += 1
+                    return True
+                if (e.status_code != 429 and e.status_code < 500) or attempt == self.max_retries:
+                    self.stats.failed += 1
+                    return False
+            except (asyncio.TimeoutError, aiohttp.ClientError):
+                if attempt == self.max_retries:
+                    self.stats.failed += 1
+                    return False
+            except Exception:
+                self.stats.failed += 1
+                return False
+            else:
+                self.stats.moderated += 1
+                return True
+            self.stats.retries += 1
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+        return False
+
+    @staticmethod
+    def _key(item: ModerationItem) -> ItemKey:
+        return ("complaint" if isinstance(item, PendingComplaintResponse) else "comment"), item.id
@@ -0,0 +1,89 @@
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import NicknameHistoryEntry, PlayersResponse, MembersResponse
+from .storage import append_records, read_records
+
+
+class NicknameIndex:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._names: Dict[Tuple[int, int], Dict[str, float]] = {}
+        self._current: Dict[Tuple[int, int], Tuple[str, float]] = {}
+        self._owners: Dict[Tuple[int, str], Tuple[int, float]] = {}
+        if path:
+            for server_id, account_id, nickname, timestamp in read_records(path):
+                self._observe(server_id, account_id, nickname, timestamp)
+
+    def feed_players(self, snapshot: PlayersResponse) -> int:
+        timestamp = snapshot.updated_at.timestamp()
+        return self._feed(snapshot.server_id, ((player.account_id, player.nickname, timestamp)
+                                               for player in snapshot.players))
+
+    def feed_members(self, members: MembersResponse) -> int:
+        timestamp = members.members_updated_at.timestamp()
+        return self._feed(members.server_id, ((player.account_id, player.nickname, timestamp)
+                                              for player in members.players))
+
+    def feed_history(self, server_id: int, account_id: int, entries: Iterable[NicknameHistoryEntry]) -> int:
+        observations = []
+        for entry in entries:
+            timestamp = entry.created_at.timestamp()
+            if entry.old_value:
+                observations.append((account_id, entry.old_value, timestamp - 1))
+            if entry.new_value:
+                observations.append((account_id, entry.new_value, timestamp))
+        return self._feed(server_id, observations)
+
+    def get_account_id(self, server_id: int, nickname: str) -> Optional[int]:
+        owner = self._owners.get((server_id, nickname.lower()))
+        return owner[0] if owner else None
+
+    def get_current_nickname(self, server_id: int, nickname: Optional[str] = None,
+                             account_id: Optional[int] = None) -> Optional[str]:
+        if not nickname and not account_id:
+            raise ValueError("Необходимо указать nickname или account_id.")
+        if account_id is None:
+            account_id = self.get_account_id(server_id, nickname)
+        current = self._current.get((server_id, account_id))
+        return current[0] if current else None
+
+    def get_nicknames(self, server_id: int, nickname: Optional[str] = None,
+                      account_id: Optional[int] = None) -> List[str]:
+        if not nickname and not account_id:
+            raise ValueError("Необходимо указать nickname или account_id.")
+        if account_id is None:
+            account_id = self.get_account_id(server_id, nickname)
+        names = self._names.get((server_id, account_id), {})
+        return sorted(names, key=names.__getitem__)
+
+    def get_last_seen(self, server_id: int, account_id: int) -> Optional[datetime.datetime]:
+        current = self._current.get((server_id, account_id))
+        return datetime.datetime.fromtimestamp(current[1], tz=datetime.timezone.utc) if current else None
+
+    def _feed(self, server_id: int, observations: Iterable[Tuple[Optional[int], str, float]]) -> int:
+        changed = [[server_id, account_id, nickname, timestamp]
+                   for account_id, nickname, timestamp in observations
+                   if account_id is not None and self._observe(server_id, account_id, nickname, timestamp)]
+        if self.path:
+            append_records(self.path, changed)
+        return len(changed)
+
+    def _observe(self, server_id: int, account_id: int, nickname: str, timestamp: float) -> bool:
+        key = (server_id, account_id)
+        names = self._names.setdefault(key, {})
+        changed = nickname not in names
+        if changed or names[nickname] < timestamp:
+            names[nickname] = timestamp
+
+        current = self._current.get(key)
+        if current is None or current[1] <= timestamp:
+            changed = changed or current is None or current[0] != nickname
+            self._current[key] = (nickname, timestamp)
+
+        owner_key = (server_id, nickname.lower())
+        owner = self._owners.get(owner_key)
+        if owner is None or owner[1] <= timestamp:
+            changed = changed or owner is None or owner[0] != account_id
+            self._owners[owner_key] = (account_id, timestamp)
+        return changed
@@ -0,0 +1,163 @@
+import datetime
+import math
+import mmap
+import os
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from pydantic import BaseModel
+
+from .main import VprikolAPI
+from .models.server import GraphPoint
+
+_FIELDS = 4
+_RECORD_SIZE = _FIELDS * array("q").itemsize
+
+
+class OnlineBucket(BaseModel):
+    time: datetime.datetime
+    count: int
+    online_min: int
+    online_max: int
+    online_avg: float
+    queue_min: int
+    queue_max: int
+    queue_avg: float
+    project_avg: float
+
+
+class OnlineHistoryStore:
+    def __init__(self, path: str, tz: datetime.tzinfo = datetime.timezone.utc):
+        self.path = path
+        self.tz = tz
+        self._maps: Dict[int, Tuple[Optional[mmap.mmap], memoryview]] = {}
+        os.makedirs(path, exist_ok=True)
+
+    def close(self) -> None:
+        for server_id in list(self._maps):
+            self._release(server_id)
+
+    async def refresh(self, api: VprikolAPI, server_id: int, max_hours: int = 168) -> int:
+        last_time = self.get_last_time(server_id)
+        hours = max_hours
+        if last_time is not None:
+            hours = min(max_hours, max(1, math.ceil((time.time() - last_time.timestamp()) / 3600)))
+        response = await api.get_server_online_history(server_id, hours=hours)
+        return self.append(server_id, response.data)
+
+    def append(self, server_id: int, points: Iterable[GraphPoint]) -> int:
+        last_time = self.get_last_time(server_id)
+        last_timestamp = int(last_time.timestamp()) if last_time else None
+        rows = array("q")
+        for point in sorted(points, key=lambda point: point.time):
+            timestamp = int(point.time.timestamp())
+            if last_timestamp is not None and timestamp <= last_timestamp:
+                continue
+            rows.extend((timestamp, point.online, point.queue, point.project_avg))
+            last_timestamp = timestamp
+        if not rows:
+            return 0
+        self._release(server_id)
+        with open(self._file(server_id), "ab") as file:
+            file.truncate(file.tell() - file.tell() % _RECORD_SIZE)
+            rows.tofile(file)
+        return len(rows) // _FIELDS
+
+    def get_last_time(self, server_id: int) -> Optional[datetime.datetime]:
+        view = self._view(server_id)
+        if not view:
+            return None
+        return datetime.datetime.fromtimestamp(view[len(view) - _FIELDS], tz=self.tz)
+
+    def get_points(self, server_id: int, date_from: Optional[datetime.datetime] = None,
+                   date_to: Optional[datetime.datetime] = None) -> List[GraphPoint]:
+        view = self._view(server_id)
+        start, end = self._bounds(view, date_from, date_to)
+        return [GraphPoint(time=datetime.datetime.fromtimestamp(view[index * _FIELDS], tz=self.tz),
+                           online=view[index * _FIELDS + 1], queue=view[index * _FIELDS + 2],
+                           project_avg=view[index * _FIELDS + 3])
+                for index in range(start, end)]
+
+    def get_buckets(self, server_id: int, buckets: int, date_from: Optional[datetime.datetime] = None,
+                    date_to: Optional[datetime.datetime] = None) -> List[OnlineBucket]:
+        if buckets <= 0:
+            raise ValueError("Количество интервалов должно быть больше нуля.")
+        view = self._view(server_id)
+        start, end = self._bounds(view, date_from, date_to)
+        if start >= end:
+            return []
+        range_start = int(date_from.timestamp()) if date_from else view[start * _FIELDS]
+        range_end = int(date_to.timestamp()) if date_to else view[(end - 1) * _FIELDS] + 1
+        width = max(1, math.ceil((range_end - range_start) / buckets))
+
+        result = []
+        index = start
+        while index < end:
+            bucket_start = range_start + (view[index * _FIELDS] - range_start) // width * width
+            bucket_end = bucket_start + width
+            count = online_sum = queue_sum = project_sum = 0
+            online_min = queue_min = None
+            online_max = queue_max = 0
+            while index < end and view[index * _FIELDS] < bucket_end:
+                offset = index * _FIELDS
+                online, queue = view[offset + 1], view[offset + 2]
+                online_min = online if online_min is None else min(online_min, online)
+                queue_min = queue if queue_min is None else min(queue_min, queue)
+                online_max = max(online_max, online)
+                queue_max = max(queue_max, queue)
+                online_sum += online
+                queue_sum += queue
+                project_sum += view[offset + 3]
+                count += 1
+                index += 1
+            result.append(OnlineBucket(time=datetime.datetime.fromtimestamp(bucket_start, tz=self.tz), count=count,
+                                       online_min=online_min, online_max=online_max, online_avg=online_sum / count,
+                                       queue_min=queue_min, queue_max=queue_max, queue_avg=queue_sum / count,
+                                       project_avg=project_sum / count))
+        return result
+
+    def _bounds(self, view: memoryview, date_from: Optional[datetime.datetime],
+                date_to: Optional[datetime.datetime]) -> Tuple[int, int]:
+        count = len(view) // _FIELDS
+        start = self._search(view, int(date_from.timestamp()), count) if date_from else 0
+        end = self._search(view, int(date_to.timestamp()) + 1, count) if date_to else count
+        return start, end
+
+    @staticmethod
+    def _search(view: memoryview, timestamp: int, count: int) -> int:
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if view[middle * _FIELDS] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _file(self, server_id: int) -> str:
+        return os.path.join(self.path, f"{server_id}.bin")
+
+    def _view(self, server_id: int) -> memoryview:
+        cached = self._maps.get(server_id)
+        if cached is not None:
+            return cached[1]
+        path = self._file(server_id)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        size -= size % _RECORD_SIZE
+        if not size:
+            mapped, view = None, memoryview(b"").cast("q")
+        else:
+            with open(path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+            view = memoryview(mapped).cast("q")
+        self._maps[server_id] = (mapped, view)
+        return view
+
+    def _release(self, server_id: int) -> None:
+        cached = self._maps.pop(server_id, None)
+        if cached is None:
+            return
+        mapped, view = cached
+        view.release()
+        if mapped is not None:
+            mapped.close()
@@ -0,0 +1,152 @@
+import bisect
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .main import VprikolAPI
+from .models import PunishHistoryEntry, PunishHistoryResponse, PunishType
+from .storage import append_records, read_records
+
+
+class PunishStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[int, PunishHistoryEntry] = {}
+        self._cursors: Dict[Tuple[int, bool], int] = {}
+        self._pending: Dict[Tuple[int, bool], Tuple[int, int, int]] = {}
+        self._by_player: Dict[str, List[int]] = {}
+        self._by_admin: Dict[str, List[int]] = {}
+        self._by_type: Dict[PunishType, List[int]] = {}
+        self._by_time: List[Tuple[float, int]] = []
+        self._by_time_sorted = True
+        if path:
+            for record in read_records(path):
+                if record[0] == "entry":
+                    self._add(PunishHistoryEntry.model_validate(record[1]))
+                else:
+                    self._cursors[(record[1], record[2])] = record[3]
+                    if len(record) > 4 and record[4] is not None:
+                        self._pending[(record[1], record[2])] = tuple(record[4])
+                    else:
+                        self._pending.pop((record[1], record[2]), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def sync(self, api: VprikolAPI, server_id: int, include_cross_server: bool = False,
+                   page_size: int = 100, max_pages: Optional[int] = None) -> int:
+        key = (server_id, include_cross_server)
+        cursor = self._cursors.get(key, 0)
+        pending = self._pending.get(key)
+        new_entries: Dict[int, PunishHistoryEntry] = {}
+        newest = lowest = None
+        resumed = pending is None
+        covered = 0
+        complete = False
+        offset = pages = 0
+        while max_pages is None or pages < max_pages:
+            page = await api.get_punishes(server_id, limit=page_size, offset=offset,
+                                          include_cross_server=include_cross_server)
+            pages += 1
+            jump = None
+            for index, entry in enumerate(page.data):
+                if entry.id <= cursor:
+                    complete = True
+                    break
+                if not resumed and entry.id <= pending[1]:
+                    jump = offset + index + pending[2]
+                    resumed = True
+                    break
+                if pending is not None and resumed and entry.id >= pending[0]:
+                    continue
+                newest = max(newest or 0, entry.id)
+                if pending is None or resumed:
+                    lowest = entry.id
+                covered += 1
+                if entry.id not in self._entries:
+                    new_entries[entry.id] = entry
+            if complete:
+                break
+            if jump is not None:
+                offset = jump
+                pages -= 1
+                continue
+            if len(page.data) < page_size:
+                complete = True
+                break
+            offset += page_size
+
+        self._add_many(list(new_entries.values()))
+        if complete:
+            latest, pending = max(cursor, newest or 0, pending[1] if pending is not None else 0), None
+        elif resumed:
+            if pending is not None:
+                newest = max(newest or 0, pending[1])
+                lowest = pending[0] if lowest is None else lowest
+                covered += pending[2]
+            latest, pending = cursor, (lowest, newest, covered) if lowest is not None else None
+        else:
+            latest = cursor
+        if latest != cursor or pending != self._pending.get(key):
+            self._cursors[key] = latest
+            if pending is None:
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = pending
+            if self.path:
+                append_records(self.path, [["cursor", server_id, include_cross_server, latest,
+                                            list(pending) if pending is not None else None]])
+        return len(new_entries)
+
+    def add(self, entries: Iterable[PunishHistoryEntry]) -> int:
+        new_entries = {entry.id: entry for entry in entries if entry.id not in self._entries}
+        self._add_many(list(new_entries.values()))
+        return len(new_entries)
+
+    def get(self, punish_id: int) -> Optional[PunishHistoryEntry]:
+        return self._entries.get(punish_id)
+
+    def query(self, server_id: Optional[int] = None, player_nickname: Optional[str] = None,
+              admin_nickname: Optional[str] = None, punish_type: Optional[PunishType] = None,
+              date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+              limit: int = 100, offset: int = 0) -> PunishHistoryResponse:
+        candidates = []
+        if player_nickname is not None:
+            candidates.append(self._by_player.get(player_nickname.lower(), []))
+        if admin_nickname is not None:
+            candidates.append(self._by_admin.get(admin_nickname.lower(), []))
+        if punish_type is not None:
+            candidates.append(self._by_type.get(punish_type, []))
+
+        if candidates:
+            ids = min(candidates, key=len)
+        else:
+            if not self._by_time_sorted:
+                self._by_time.sort()
+                self._by_time_sorted = True
+            start = bisect.bisect_left(self._by_time, (date_from.timestamp(), 0)) if date_from else 0
+            end = bisect.bisect_right(self._by_time, (date_to.timestamp(), float("inf"))) if date_to else len(self._by_time)
+            ids = [punish_id for _, punish_id in self._by_time[start:end]]
+
+        matched = [entry for entry in map(self._entries.__getitem__, ids)
+                   if (server_id is None or entry.server_id == server_id)
+                   and (player_nickname is None or entry.player_nickname.lower() == player_nickname.lower())
+                   and (admin_nickname is None or entry.admin_nickname.lower() == admin_nickname.lower())
+                   and (punish_type is None or entry.punish_type == punish_type)
+                   and (date_from is None or entry.created_at >= date_from)
+                   and (date_to is None or entry.created_at <= date_to)]
+        matched.sort(key=lambda entry: (entry.created_at, entry.id), reverse=True)
+        return PunishHistoryResponse(total=len(matched), limit=limit, offset=offset, data=matched[offset:offset + limit])
+
+    def _add_many(self, entries: List[PunishHistoryEntry]) -> None:
+        for entry in entries:
+            self._add(entry)
+        if self.path:
+            append_records(self.path, (["entry", entry.model_dump(mode="json")] for entry in entries))
+
+    def _add(self, entry: PunishHistoryEntry) -> None:
+        self._entries[entry.id] = entry
+        self._by_player.setdefault(entry.player_nickname.lower(), []).append(entry.id)
+        self._by_admin.setdefault(entry.admin_nickname.lower(), []).append(entry.id)
+        self._by_type.setdefault(entry.punish_type, []).append(entry.id)
+        self._by_time.append((entry.created_at.timestamp(), entry.id))
+        self._by_time_sorted = False
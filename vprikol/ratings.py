@@ -0,0 +1,252 @@
+import base64
+import bisect
+import datetime
+import os
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from pydantic import BaseModel
+
+from .models import RatingResponse, RatingType
+from .storage import append_records, read_records, read_snapshot, write_snapshot
+
+_CHECKPOINT_INTERVAL = 32
+
+
+class RatingHistoryPoint(BaseModel):
+    time: datetime.datetime
+    position: int
+    value: Any
+
+
+class RatingMovement(BaseModel):
+    nickname: str
+    old_position: Optional[int]
+    new_position: Optional[int]
+    old_value: Any
+    new_value: Any
+    change: int
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    value = -2 * value - 1 if value < 0 else 2 * value
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varints(buffer: bytearray, offset: int = 0) -> Iterator[int]:
+    value = shift = 0
+    for index in range(offset, len(buffer)):
+        byte = buffer[index]
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield (value >> 1) ^ -(value & 1)
+        value = shift = 0
+
+
+def _as_int(value: Any) -> Optional[int]:
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+
+class _RatingSeries:
+    __slots__ = ("times", "streams", "last", "raw_values", "checkpoint_snapshots", "checkpoints")
+
+    def __init__(self):
+        self.times = array("q")
+        self.streams: Dict[int, bytearray] = {}
+        self.last: Dict[int, Tuple[int, int, int, int]] = {}
+        self.raw_values: Dict[Tuple[int, int], Any] = {}
+        self.checkpoint_snapshots: Dict[int, array] = {}
+        self.checkpoints: Dict[int, array] = {}
+
+    @classmethod
+    def restore(cls, times: List[int], streams: Dict[int, bytearray],
+                raw_values: Dict[Tuple[int, int], Any]) -> "_RatingSeries":
+        encoded = cls()
+        encoded.streams = streams
+        encoded.raw_values = raw_values
+        rows: List[List[Tuple[int, int, Any]]] = [[] for _ in times]
+        for name_id in streams:
+            for snapshot, position, value in encoded.iter_player(name_id):
+                rows[snapshot].append((name_id, position, value))
+
+        series = cls()
+        for timestamp, snapshot_rows in zip(times, rows):
+            snapshot_rows.sort(key=lambda row: row[1])
+            series.append(timestamp, snapshot_rows)
+        return series
+
+    def append(self, timestamp: int, rows: List[Tuple[int, int, Any]]) -> None:
+        snapshot = len(self.times)
+        self.times.append(timestamp)
+        for name_id, position, value in rows:
+            previous_snapshot, previous_position, previous_value, count = self.last.get(name_id, (-1, 0, 0, 0))
+            int_value = _as_int(value)
+            if int_value is None:
+                self.raw_values[(name_id, snapshot)] = value
+                int_value = previous_value
+            stream = self.streams.setdefault(name_id, bytearray())
+            if count % _CHECKPOINT_INTERVAL == 0:
+                self.checkpoint_snapshots.setdefault(name_id, array("q")).append(snapshot)
+                self.checkpoints.setdefault(name_id, array("q")).extend(
+                    (len(stream), previous_snapshot, previous_position, previous_value))
+            _write_varint(stream, snapshot - previous_snapshot)
+            _write_varint(stream, position - previous_position)
+            _write_varint(stream, int_value - previous_value)
+            self.last[name_id] = (snapshot, position, int_value, count + 1)
+
+    def iter_player(self, name_id: int, from_snapshot: Optional[int] = None) -> Iterator[Tuple[int, int, Any]]:
+        snapshot, position, value, offset = -1, 0, 0, 0
+        if from_snapshot is not None and name_id in self.checkpoints:
+            index = bisect.bisect_right(self.checkpoint_snapshots[name_id], from_snapshot) - 1
+            if index >= 0:
+                offset, snapshot, position, value = self.checkpoints[name_id][index * 4:index * 4 + 4]
+        values = _read_varints(self.streams.get(name_id, bytearray()), offset)
+        for snapshot_delta in values:
+            snapshot += snapshot_delta
+            position += next(values)
+            value += next(values)
+            yield snapshot, position, self.raw_values.get((name_id, snapshot), value)
+
+    def get_rows(self, snapshot: int) -> Dict[int, Tuple[int, Any]]:
+        if snapshot < 0:
+            return {}
+        rows = {}
+        for name_id, last in self.last.items():
+            if last[0] < snapshot or self.checkpoint_snapshots[name_id][0] > snapshot:
+                continue
+            for player_snapshot, position, value in self.iter_player(name_id, snapshot):
+                if player_snapshot >= snapshot:
+                    if player_snapshot == snapshot:
+                        rows[name_id] = (position, value)
+                    break
+        return rows
+
+    def snapshot_at(self, moment: datetime.datetime) -> int:
+        return bisect.bisect_right(self.times, int(moment.timestamp())) - 1
+
+
+class RatingTracker:
+    def __init__(self, path: Optional[str] = None, tz: datetime.tzinfo = datetime.timezone.utc):
+        self.path = path
+        self.tz = tz
+        self._name_ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._series: Dict[Tuple[int, RatingType], _RatingSeries] = {}
+        if path:
+            self._load()
+
+    def feed(self, rating: RatingResponse) -> bool:
+        series = self._series.setdefault((rating.server_id, rating.rating_type), _RatingSeries())
+        timestamp = int(rating.updated_at.timestamp())
+        if series.times and timestamp <= series.times[-1]:
+            return False
+        known_names = len(self._names)
+        rows = [(self._intern(player.nickname), player.position, player.value) for player in rating.players]
+        series.append(timestamp, rows)
+        if self.path:
+            records = []
+            if len(self._names) > known_names:
+                records.append(["names", self._names[known_names:]])
+            records.append(["feed", rating.server_id, rating.rating_type.value, timestamp, rows])
+            append_records(self._log_path, records)
+        return True
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        write_snapshot(self.path, {
+            "names": self._names,
+            "series": [[server_id, rating_type.value, list(series.times),
+                        {str(name_id): base64.b64encode(stream).decode() for name_id, stream in series.streams.items()},
+                        [[name_id, snapshot, value] for (name_id, snapshot), value in series.raw_values.items()]]
+                       for (server_id, rating_type), series in self._series.items()]})
+        if os.path.exists(self._log_path):
+            os.remove(self._log_path)
+
+    @property
+    def _log_path(self) -> str:
+        return f"{self.path}.log"
+
+    def get_history(self, server_id: int, rating_type: RatingType, nickname: str,
+                    date_from: Optional[datetime.datetime] = None,
+                    date_to: Optional[datetime.datetime] = None) -> List[RatingHistoryPoint]:
+        series = self._series.get((server_id, rating_type))
+        name_id = self._name_ids.get(nickname)
+        if series is None or name_id is None:
+            return []
+        start = date_from.timestamp() if date_from else float("-inf")
+        end = date_to.timestamp() if date_to else float("inf")
+
+        history = []
+        for snapshot, position, value in series.iter_player(name_id):
+            timestamp = series.times[snapshot]
+            if timestamp > end:
+                break
+            if timestamp >= start:
+                history.append(RatingHistoryPoint(time=datetime.datetime.fromtimestamp(timestamp, tz=self.tz),
+                                                  position=position, value=value))
+        return history
+
+    def get_movers(self, server_id: int, rating_type: RatingType, date_from: datetime.datetime,
+                   date_to: datetime.datetime, limit: int = 10) -> List[RatingMovement]:
+        series = self._series.get((server_id, rating_type))
+        if series is None:
+            return []
+        old_snapshot = series.snapshot_at(date_from)
+        new_snapshot = series.snapshot_at(date_to)
+        if new_snapshot < 0 or old_snapshot == new_snapshot:
+            return []
+
+        old_rows = series.get_rows(old_snapshot)
+        new_rows = series.get_rows(new_snapshot)
+        old_size = max((position for position, _ in old_rows.values()), default=0)
+        new_size = max((position for position, _ in new_rows.values()), default=0)
+        rows = [(name_id, old_rows.get(name_id), new_rows.get(name_id))
+                for name_id in {**old_rows, **new_rows}]
+
+        unranked = max(old_size, new_size) + 1
+        changes = [((old[0] if old else unranked) - (new[0] if new else unranked), name_id, old, new)
+                   for name_id, old, new in rows]
+        changes.sort(key=lambda row: abs(row[0]), reverse=True)
+        return [RatingMovement(nickname=self._names[name_id],
+                               old_position=old[0] if old else None,
+                               new_position=new[0] if new else None,
+                               old_value=old[1] if old else None,
+                               new_value=new[1] if new else None,
+                               change=change)
+                for change, name_id, old, new in changes[:limit]]
+
+    def _intern(self, nickname: str) -> int:
+        name_id = self._name_ids.get(nickname)
+        if name_id is None:
+            name_id = self._name_ids[nickname] = len(self._names)
+            self._names.append(nickname)
+        return name_id
+
+    def _load(self) -> None:
+        snapshot = read_snapshot(self.path)
+        if snapshot is not None:
+            for nickname in snapshot["names"]:
+                self._intern(nickname)
+            for server_id, rating_type, times, streams, raw_values in snapshot["series"]:
+                self._series[(server_id, RatingType(rating_type))] = _RatingSeries.restore(
+                    times, {int(name_id): bytearray(base64.b64decode(stream)) for name_id, stream in streams.items()},
+                    {(name_id, index): value for name_id, index, value in raw_values})
+
+        for record in read_records(self._log_path):
+            if record[0] == "names":
+                for nickname in record[1]:
+                    self._intern(nickname)
+                continue
+            _, server_id, rating_type, timestamp, rows = record
+            series = self._series.setdefault((server_id, RatingType(rating_type)), _RatingSeries())
+            if not series.times or timestamp > series.times[-1]:
+                series.append(timestamp, [tuple(row) for row in rows])
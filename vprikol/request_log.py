@@ -0,0 +1,204 @@
+import bisect
+import datetime
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .main import VprikolAPI
+from .models import RequestLogEntry, RequestStatsResponse
+
+_HOUR = 3600
+
+
+def _timestamp(value: datetime.datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp())
+
+
+class _Dictionary:
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class RequestLogAnalytics:
+    def __init__(self, token_id: Optional[int] = None, page_size: int = 50):
+        self.token_id = token_id
+        self.page_size = page_size
+        self.last_id: Optional[int] = None
+        self._ids = array("q")
+        self._times = array("q")
+        self._methods = array("I")
+        self._ips = array("I")
+        self._method_names = _Dictionary()
+        self._ip_addresses = _Dictionary()
+        self._method_counts: Dict[str, int] = {}
+        self._ip_counts: Dict[str, int] = {}
+        self._hour_counts: Dict[int, int] = {}
+        self._descending: Optional[bool] = None
+        self._pending: Optional[Tuple[int, int, Optional[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def refresh(self, api: VprikolAPI, date_from: Optional[datetime.datetime] = None,
+                      max_pages: Optional[int] = None) -> int:
+        entries: List[RequestLogEntry] = []
+        start_id = None
+        if self.last_id is not None and self._descending is False:
+            start_id = self.last_id + 1
+        pending = self._pending
+        resumed = pending is None
+        newest = lowest = None
+        complete = False
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            page = await api.get_token_requests_history(token_id=self.token_id, limit=self.page_size,
+                                                        request_start_id=start_id, date_from=date_from)
+            pages += 1
+            if self._descending is None and len(page.data) > 1:
+                self._descending = page.data[0].id > page.data[-1].id
+            jump = None
+            for entry in page.data:
+                if self.last_id is not None and entry.id <= self.last_id:
+                    complete = True
+                    break
+                if not resumed and entry.id <= pending[1]:
+                    jump = pending[2]
+                    resumed = True
+                    break
+                if pending is not None and resumed and entry.id >= pending[0]:
+                    continue
+                entries.append(entry)
+                newest = max(newest or 0, entry.id)
+                if resumed:
+                    lowest = entry.id
+            if complete:
+                break
+            if jump is not None:
+                start_id = jump
+                pages -= 1
+                continue
+            if page.next_request_start_id is None or page.next_request_start_id == start_id:
+                complete = True
+                break
+            start_id = page.next_request_start_id
+
+        if not complete and not resumed:
+            return 0
+        added = self._ingest(entries)
+        if not self._descending:
+            if entries:
+                self.last_id = max(self.last_id or 0, newest)
+        elif complete:
+            top = max(newest or 0, pending[1] if pending is not None else 0)
+            if top:
+                self.last_id = max(self.last_id or 0, top)
+            self._pending = None
+        elif resumed:
+            if pending is not None:
+                newest = max(newest or 0, pending[1])
+                lowest = pending[0] if lowest is None else lowest
+            if lowest is not None:
+                self._pending = (lowest, newest, start_id)
+        return added
+
+    def feed(self, entries: Iterable[RequestLogEntry]) -> int:
+        entries = list(entries)
+        added = self._ingest(entries)
+        newest = max((entry.id for entry in entries), default=None)
+        if newest is not None:
+            if self._pending is not None:
+                self._pending = (self._pending[0], max(self._pending[1], newest), self._pending[2])
+            else:
+                self.last_id = max(self.last_id or 0, newest)
+        return added
+
+    def _ingest(self, entries: Iterable[RequestLogEntry]) -> int:
+        pending = self._pending
+        rows = sorted((_timestamp(entry.created_at), entry.id, entry.api_method or "", entry.ip_address)
+                      for entry in entries if (self.last_id is None or entry.id > self.last_id)
+                      and (pending is None or not pending[0] <= entry.id <= pending[1]))
+        if not rows:
+            return 0
+        added = len(rows)
+        self._count(rows)
+        if self._times and rows[0][0] < self._times[-1]:
+            rows = sorted(list(zip(self._times, self._ids, self._decode(self._methods, self._method_names),
+                                   self._decode(self._ips, self._ip_addresses))) + rows)
+            self._times, self._ids, self._methods, self._ips = array("q"), array("q"), array("I"), array("I")
+
+        for moment, entry_id, method, ip_address in rows:
+            self._times.append(moment)
+            self._ids.append(entry_id)
+            self._methods.append(self._method_names.encode(method))
+            self._ips.append(self._ip_addresses.encode(ip_address))
+        return added
+
+    def get_stats(self, date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+                  api_method: Optional[str] = None, ip_address: Optional[str] = None) -> RequestStatsResponse:
+        if date_from is None and date_to is None and api_method is None and ip_address is None:
+            return RequestStatsResponse(total_count=len(self._ids), methods=dict(self._method_counts))
+        counts: Dict[int, int] = {}
+        for method in self._scan(date_from, date_to, api_method, ip_address, self._methods):
+            counts[method] = counts.get(method, 0) + 1
+        methods = {self._method_names.values[code]: count for code, count in counts.items()}
+        return RequestStatsResponse(total_count=sum(methods.values()), methods=methods)
+
+    def get_ip_counts(self, date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+                      api_method: Optional[str] = None) -> Dict[str, int]:
+        if date_from is None and date_to is None and api_method is None:
+            return dict(self._ip_counts)
+        counts: Dict[int, int] = {}
+        for ip in self._scan(date_from, date_to, api_method, None, self._ips):
+            counts[ip] = counts.get(ip, 0) + 1
+        return {self._ip_addresses.values[code]: count for code, count in counts.items()}
+
+    def get_hourly(self, date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+                   api_method: Optional[str] = None, ip_address: Optional[str] = None) -> Dict[datetime.datetime, int]:
+        if date_from is None and date_to is None and api_method is None and ip_address is None:
+            counts = self._hour_counts
+        else:
+            counts = {}
+            for moment in self._scan(date_from, date_to, api_method, ip_address, self._times):
+                hour = moment // _HOUR * _HOUR
+                counts[hour] = counts.get(hour, 0) + 1
+        return {datetime.datetime.fromtimestamp(hour, tz=datetime.timezone.utc): counts[hour] for hour in sorted(counts)}
+
+    def _scan(self, date_from: Optional[datetime.datetime], date_to: Optional[datetime.datetime],
+              api_method: Optional[str], ip_address: Optional[str], column: array) -> Iterable[int]:
+        start = bisect.bisect_left(self._times, _timestamp(date_from)) if date_from else 0
+        end = bisect.bisect_right(self._times, _timestamp(date_to)) if date_to else len(self._times)
+        method = self._method_names.codes.get(api_method) if api_method is not None else None
+        ip = self._ip_addresses.codes.get(ip_address) if ip_address is not None else None
+        if (api_method is not None and method is None) or (ip_address is not None and ip is None):
+            return []
+        values = column[start:end]
+        if method is not None:
+            values = [value for value, code in zip(values, self._methods[start:end]) if code == method] \
+                if ip is None else \
+                [value for value, code, ip_code in zip(values, self._methods[start:end], self._ips[start:end])
+                 if code == method and ip_code == ip]
+        elif ip is not None:
+            values = [value for value, ip_code in zip(values, self._ips[start:end]) if ip_code == ip]
+        return values
+
+    def _count(self, rows: List[Tuple[int, int, str, str]]) -> None:
+        for moment, _, method, ip_address in rows:
+            self._method_counts[method] = self._method_counts.get(method, 0) + 1
+            self._ip_counts[ip_address] = self._ip_counts.get(ip_address, 0) + 1
+            hour = moment // _HOUR * _HOUR
+            self._hour_counts[hour] = self._hour_counts.get(hour, 0) + 1
+
+    @staticmethod
+    def _decode(column: array, dictionary: _Dictionary) -> List[str]:
+        return [dictionary.values[code] for code in column]
@@ -0,0 +1,109 @@
+import asyncio
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .main import VprikolAPI
+from .models import MembersResponse, MembersPlayer, FractionMemberHistoryEntry
+from .storage import append_records, read_records
+
+MemberKey = Union[int, str]
+
+
+class FractionRosterTracker:
+    def __init__(self, api: VprikolAPI, server_id: int, fraction_ids: Iterable[int], path: Optional[str] = None,
+                 concurrency: int = 8):
+        self.api = api
+        self.server_id = server_id
+        self.fraction_ids = list(fraction_ids)
+        self.path = path
+        self.concurrency = concurrency
+        self._rosters: Dict[int, MembersResponse] = {}
+        self._events: List[FractionMemberHistoryEntry] = []
+        if path:
+            self._events = [FractionMemberHistoryEntry.model_validate(record) for record in read_records(path)]
+
+    async def refresh(self) -> List[FractionMemberHistoryEntry]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(fraction_id: int) -> MembersResponse:
+            async with semaphore:
+                return await self.api.get_fraction_members(self.server_id, fraction_id)
+
+        results = await asyncio.gather(*(fetch(fraction_id) for fraction_id in self.fraction_ids), return_exceptions=True)
+        fetched = {fraction_id: result for fraction_id, result in zip(self.fraction_ids, results)
+                   if isinstance(result, MembersResponse)}
+        if not fetched:
+            errors = [result for result in results if isinstance(result, BaseException)]
+            if errors:
+                raise errors[0]
+            return []
+
+        known = set(self._rosters)
+        previous = self._index(self._rosters.values())
+        self._rosters.update(fetched)
+        current = self._index(self._rosters.values())
+
+        events = []
+        for key in current.keys() | previous.keys():
+            old = previous.get(key)
+            new = current.get(key)
+            if old is not None and new is not None:
+                if old[0].fraction_id != new[0].fraction_id:
+                    events.append(self._event("fraction_change", old, new, new[0].members_updated_at))
+                elif old[1].rank_number != new[1].rank_number:
+                    events.append(self._event("rank_change", old, new, new[0].members_updated_at))
+            elif new is not None and new[0].fraction_id in known:
+                events.append(self._event("invite", None, new, new[0].members_updated_at))
+            elif old is not None and old[0].fraction_id in fetched:
+                events.append(self._event("uninvite", old, None, fetched[old[0].fraction_id].members_updated_at))
+
+        events.sort(key=lambda event: (event.created_at, event.nickname))
+        for event in events:
+            event.id = len(self._events) + 1
+            self._events.append(event)
+        if self.path:
+            append_records(self.path, (event.model_dump(mode="json") for event in events))
+        return events
+
+    def get_members(self, fraction_id: int) -> List[MembersPlayer]:
+        roster = self._rosters.get(fraction_id)
+        return list(roster.players) if roster else []
+
+    def get_events(self, nickname: Optional[str] = None, fraction_id: Optional[int] = None,
+                   action: Optional[str] = None, date_from: Optional[datetime.datetime] = None,
+                   date_to: Optional[datetime.datetime] = None) -> List[FractionMemberHistoryEntry]:
+        return [event for event in reversed(self._events)
+                if (nickname is None or event.nickname.lower() == nickname.lower())
+                and (fraction_id is None or fraction_id in (event.old_fraction_id, event.new_fraction_id))
+                and (action is None or event.action == action)
+                and (date_from is None or event.created_at >= date_from)
+                and (date_to is None or event.created_at <= date_to)]
+
+    @staticmethod
+    def _index(rosters: Iterable[MembersResponse]) -> Dict[MemberKey, Tuple[MembersResponse, MembersPlayer]]:
+        index = {}
+        for roster in rosters:
+            for player in roster.players:
+                index[player.account_id if player.account_id is not None else player.nickname] = (roster, player)
+        return index
+
+    def _event(self, action: str, old: Optional[Tuple[MembersResponse, MembersPlayer]],
+               new: Optional[Tuple[MembersResponse, MembersPlayer]],
+               created_at: datetime.datetime) -> FractionMemberHistoryEntry:
+        roster, player = new or old
+        return FractionMemberHistoryEntry(
+            id=0,
+            server_id=self.server_id,
+            server_label=roster.server_label,
+            nickname=player.nickname,
+            action=action,
+            old_fraction_id=old[0].fraction_id if old else None,
+            old_fraction_label=old[0].fraction_label if old else None,
+            new_fraction_id=new[0].fraction_id if new else None,
+            new_fraction_label=new[0].fraction_label if new else None,
+            old_rank_label=old[1].rank_label if old else None,
+            new_rank_label=new[1].rank_label if new else None,
+            old_rank_number=old[1].rank_number if old else None,
+            new_rank_number=new[1].rank_number if new else None,
+            created_at=created_at
+        )
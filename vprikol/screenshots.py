@@ -0,0 +1,57 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .main import ScreenSource, VprikolAPI
+from .models import SSFont
+
+
+class ScreenshotJob(NamedTuple):
+    destination: Union[str, os.PathLike, Any]
+    screen: ScreenSource
+    commands: List[str]
+    text_top: bool = True
+    font: SSFont = SSFont.ARIAL_BOLD
+    text_size: float = 0.95
+    commands_colors: Optional[Dict[str, str]] = None
+
+
+class ScreenshotBatch:
+    def __init__(self, api: VprikolAPI, concurrency: int = 4):
+        self.api = api
+        self.concurrency = concurrency
+        self._jobs: List[ScreenshotJob] = []
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(self, destination: Union[str, os.PathLike, Any], screen: ScreenSource, commands: List[str],
+            text_top: bool = True, font: SSFont = SSFont.ARIAL_BOLD, text_size: float = 0.95,
+            commands_colors: Optional[Dict[str, str]] = None) -> ScreenshotJob:
+        job = ScreenshotJob(destination, screen, commands, text_top, font, text_size, commands_colors)
+        self._jobs.append(job)
+        return job
+
+    async def run(self) -> AsyncIterator[Tuple[ScreenshotJob, Union[int, Exception]]]:
+        jobs, self._jobs = self._jobs, []
+        if not jobs:
+            return
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def render(job: ScreenshotJob) -> Tuple[ScreenshotJob, Union[int, Exception]]:
+            async with semaphore:
+                try:
+                    return job, await self.api.generate_ss_to(*job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    return job, e
+
+        tasks = [asyncio.ensure_future(render(job)) for job in jobs]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,136 @@
+import datetime
+from array import array
+from typing import Dict, List, Optional, Tuple, Union, Iterator
+
+from .models import PlayersResponse, PlayerSessionEntry, CalendarDayEntry
+from .storage import append_records, read_records
+
+AccountKey = Union[int, str]
+
+
+class SessionTracker:
+    def __init__(self, path: Optional[str] = None, gap_timeout: float = 600,
+                 tz: datetime.tzinfo = datetime.timezone.utc):
+        self.path = path
+        self.gap_timeout = gap_timeout
+        self.tz = tz
+        self._snapshot_at: Dict[int, float] = {}
+        self._open: Dict[int, Dict[AccountKey, List[int]]] = {}
+        self._sessions: Dict[Tuple[int, AccountKey], array] = {}
+        self._days: Dict[Tuple[int, AccountKey], Dict[datetime.date, List[int]]] = {}
+        self._nicknames: Dict[Tuple[int, AccountKey], str] = {}
+        self._keys: Dict[Tuple[int, str], AccountKey] = {}
+        if path:
+            for server_id, key, nickname, login_at, logout_at in read_records(path):
+                self._remember(server_id, key, nickname)
+                self._store(server_id, key, login_at, logout_at)
+
+    def feed(self, snapshot: PlayersResponse) -> List[Tuple[AccountKey, PlayerSessionEntry]]:
+        server_id = snapshot.server_id
+        now = int(snapshot.updated_at.timestamp())
+        previous = self._snapshot_at.get(server_id)
+        if previous is not None and now <= previous:
+            return []
+
+        opened = self._open.setdefault(server_id, {})
+        closed: List[Tuple[AccountKey, int, int]] = []
+        if previous is not None and now - previous > self.gap_timeout:
+            closed.extend((key, login_at, last_seen_at) for key, (login_at, last_seen_at) in opened.items())
+            opened.clear()
+
+        present = set()
+        for player in snapshot.players:
+            key = player.account_id if player.account_id is not None else player.nickname
+            present.add(key)
+            self._remember(server_id, key, player.nickname)
+            session = opened.get(key)
+            if session is None:
+                opened[key] = [now, now]
+            else:
+                session[1] = now
+
+        for key in [key for key in opened if key not in present]:
+            login_at, last_seen_at = opened.pop(key)
+            closed.append((key, login_at, last_seen_at))
+        self._snapshot_at[server_id] = now
+
+        for key, login_at, logout_at in closed:
+            self._store(server_id, key, login_at, logout_at)
+        if self.path:
+            append_records(self.path, ([server_id, key, self._nicknames[(server_id, key)], login_at, logout_at]
+                                       for key, login_at, logout_at in closed))
+        return [(key, PlayerSessionEntry(login_at=self._to_datetime(login_at), logout_at=self._to_datetime(logout_at)))
+                for key, login_at, logout_at in closed]
+
+    def resolve(self, server_id: int, nickname: Optional[str] = None, account_id: Optional[int] = None) -> Optional[AccountKey]:
+        if account_id is not None:
+            return account_id
+        if not nickname:
+            raise ValueError("Необходимо указать nickname или account_id.")
+        return self._keys.get((server_id, nickname.lower()))
+
+    def get_nickname(self, server_id: int, key: AccountKey) -> Optional[str]:
+        return self._nicknames.get((server_id, key))
+
+    def iter_accounts(self, server_id: int) -> Iterator[AccountKey]:
+        for account_server_id, key in self._nicknames:
+            if account_server_id == server_id:
+                yield key
+
+    def is_online(self, server_id: int, nickname: Optional[str] = None, account_id: Optional[int] = None) -> bool:
+        key = self.resolve(server_id, nickname, account_id)
+        return key in self._open.get(server_id, {})
+
+    def get_sessions(self, server_id: int, nickname: Optional[str] = None, account_id: Optional[int] = None,
+                     date_from: Optional[datetime.datetime] = None,
+                     date_to: Optional[datetime.datetime] = None) -> List[PlayerSessionEntry]:
+        key = self.resolve(server_id, nickname, account_id)
+        start = date_from.timestamp() if date_from else float("-inf")
+        end = date_to.timestamp() if date_to else float("inf")
+
+        sessions = []
+        session = self._open.get(server_id, {}).get(key)
+        if session is not None and start <= session[0] <= end:
+            sessions.append(PlayerSessionEntry(login_at=self._to_datetime(session[0]), logout_at=None))
+        stored = self._sessions.get((server_id, key), array("q"))
+        for index in range(len(stored) - 2, -1, -2):
+            login_at = stored[index]
+            if start <= login_at <= end:
+                sessions.append(PlayerSessionEntry(login_at=self._to_datetime(login_at),
+                                                   logout_at=self._to_datetime(stored[index + 1])))
+        return sessions
+
+    def get_calendar(self, server_id: int, year: int, month: int, nickname: Optional[str] = None,
+                     account_id: Optional[int] = None) -> List[CalendarDayEntry]:
+        key = self.resolve(server_id, nickname, account_id)
+        days = self._days.get((server_id, key), {})
+        return [CalendarDayEntry(date=day, count=len(durations), durations=list(durations),
+                                 total_played_minutes=sum(durations))
+                for day, durations in sorted(days.items())
+                if day.year == year and day.month == month]
+
+    def _remember(self, server_id: int, key: AccountKey, nickname: str) -> None:
+        previous = self._nicknames.get((server_id, key))
+        if previous == nickname:
+            return
+        if previous is not None and self._keys.get((server_id, previous.lower())) == key:
+            del self._keys[(server_id, previous.lower())]
+        self._nicknames[(server_id, key)] = nickname
+        self._keys[(server_id, nickname.lower())] = key
+
+    def _store(self, server_id: int, key: AccountKey, login_at: int, logout_at: int) -> None:
+        self._sessions.setdefault((server_id, key), array("q")).extend((login_at, logout_at))
+        days = self._days.setdefault((server_id, key), {})
+        start = login_at
+        day = self._to_datetime(login_at).date()
+        while True:
+            next_day = day + datetime.timedelta(days=1)
+            midnight = int(datetime.datetime.combine(next_day, datetime.time(), tzinfo=self.tz).timestamp())
+            end = min(logout_at, midnight)
+            days.setdefault(day, []).append((end - start) // 60)
+            if end >= logout_at:
+                break
+            start, day = end, next_day
+
+    def _to_datetime(self, timestamp: int) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(timestamp, tz=self.tz)
@@ -0,0 +1,46 @@
+import os
+import orjson
+from typing import Any, Iterable, Iterator
+
+
+def append_records(path: str, records: Iterable[Any]) -> None:
+    data = b"".join(orjson.dumps(record) + b"\n" for record in records)
+    if not data:
+        return
+    with open(path, "ab") as file:
+        file.write(data)
+
+
+def read_records(path: str) -> Iterator[Any]:
+    if not os.path.exists(path):
+        return
+    complete = 0
+    with open(path, "rb") as file:
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            complete += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+    if complete < os.path.getsize(path):
+        with open(path, "r+b") as file:
+            file.truncate(complete)
+
+
+def write_snapshot(path: str, data: Any) -> None:
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(orjson.dumps(data))
+    os.replace(temporary_path, path)
+
+
+def read_snapshot(path: str) -> Any:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as file:
+        return orjson.loads(file.read())
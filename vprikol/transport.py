@@ -0,0 +1,197 @@
+import asyncio
+import contextlib
+import inspect
+from typing import (Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional,
+                    Protocol, Tuple, Union)
+
+import aiohttp
+import orjson
+
+from .metrics import RequestTrace
+
+RawResponse = Tuple[int, str, bytes]
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class StreamedResponse(NamedTuple):
+    status: int
+    content_type: str
+    chunks: AsyncIterator[bytes]
+
+
+class Transport(Protocol):
+    async def request(self, method: str, url: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+                      trace: Optional[RequestTrace] = None) -> RawResponse:
+        ...
+
+    def stream(self, method: str, url: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+               trace: Optional[RequestTrace] = None) -> AsyncContextManager[StreamedResponse]:
+        ...
+
+    async def open(self) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class AiohttpTransport:
+    def __init__(self, headers: Optional[Dict[str, str]] = None,
+                 trace_configs: Optional[List[aiohttp.TraceConfig]] = None, unix_socket: Optional[str] = None,
+                 limit: int = 100, keepalive_timeout: float = 15.0):
+        self.headers = headers if headers is not None else {}
+        self.trace_configs = trace_configs
+        self.unix_socket = unix_socket
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def open(self) -> None:
+        if self.closed:
+            self._session = self._create_session()
+
+    async def close(self) -> None:
+        if not self.closed:
+            await self._session.close()
+
+    async def request(self, method: str, url: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+                      trace: Optional[RequestTrace] = None) -> RawResponse:
+        if not self.closed:
+            return await self._request(self._session, method, url, params, json_body, data, trace)
+        async with self._create_session() as session:
+            return await self._request(session, method, url, params, json_body, data, trace)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+                     trace: Optional[RequestTrace] = None) -> AsyncIterator[StreamedResponse]:
+        async with contextlib.AsyncExitStack() as stack:
+            session = self._session if not self.closed else await stack.enter_async_context(self._create_session())
+            response = await stack.enter_async_context(
+                session.request(method, url, params=params, json=json_body, data=data, trace_request_ctx=trace))
+            if trace is not None:
+                trace.headers_received(response.status)
+            yield StreamedResponse(response.status, response.content_type, self._iter_body(response, trace))
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        if self.unix_socket:
+            connector = aiohttp.UnixConnector(path=self.unix_socket, limit=self.limit,
+                                              keepalive_timeout=self.keepalive_timeout)
+        else:
+            connector = aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=self.keepalive_timeout)
+        return aiohttp.ClientSession(headers=self.headers, json_serialize=lambda x: orjson.dumps(x).decode(),
+                                     trace_configs=self.trace_configs, connector=connector)
+
+    @staticmethod
+    async def _request(session: aiohttp.ClientSession, method: str, url: str, params: Optional[Dict[str, Any]],
+                       json_body: Any, data: Any, trace: Optional[RequestTrace]) -> RawResponse:
+        async with session.request(method, url, params=params, json=json_body, data=data,
+                                   trace_request_ctx=trace) as response:
+            if trace is not None:
+                trace.headers_received(response.status)
+            body = await response.read()
+            if trace is not None:
+                trace.body_received(len(body))
+            return response.status, response.content_type, body
+
+    @staticmethod
+    async def _iter_body(response: aiohttp.ClientResponse, trace: Optional[RequestTrace]) -> AsyncIterator[bytes]:
+        size = 0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            size += len(chunk)
+            yield chunk
+        if trace is not None:
+            trace.body_received(size)
+
+
+async def _iter_chunks(body: bytes) -> AsyncIterator[bytes]:
+    for offset in range(0, len(body), STREAM_CHUNK_SIZE):
+        yield body[offset:offset + STREAM_CHUNK_SIZE]
+
+
+Handler = Callable[[str, str, Optional[Dict[str, Any]], Any, Any], Union[Any, Awaitable[Any]]]
+
+
+class MockTransport:
+    def __init__(self, handler: Handler, latency: float = 0.0):
+        self.handler = handler
+        self.latency = latency
+        self.requests = 0
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def request(self, method: str, url: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+                      trace: Optional[RequestTrace] = None) -> RawResponse:
+        self.requests += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        result = self.handler(method, url, params, json_body, data)
+        if inspect.isawaitable(result):
+            result = await result
+
+        if isinstance(result, tuple):
+            status, content_type, body = result
+        elif isinstance(result, (bytes, bytearray)):
+            status, content_type, body = 200, "application/octet-stream", bytes(result)
+        elif result is None:
+            status, content_type, body = 204, "application/octet-stream", b""
+        else:
+            status, content_type, body = 200, "application/json", orjson.dumps(result)
+        if trace is not None:
+            trace.headers_received(status)
+            trace.body_received(len(body))
+        return status, content_type, body
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+                     trace: Optional[RequestTrace] = None) -> AsyncIterator[StreamedResponse]:
+        status, content_type, body = await self.request(method, url, params, json_body, data, trace)
+        yield StreamedResponse(status, content_type, _iter_chunks(body))
+
+
+class CoalescingTransport:
+    def __init__(self, transport: Transport, methods: Tuple[str, ...] = ("GET",)):
+        self.transport = transport
+        self.methods = methods
+        self.coalesced = 0
+        self._in_flight: Dict[Tuple[str, str, bytes], asyncio.Future] = {}
+
+    async def open(self) -> None:
+        await self.transport.open()
+
+    async def close(self) -> None:
+        await self.transport.close()
+
+    def stream(self, method: str, url: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+               trace: Optional[RequestTrace] = None) -> AsyncContextManager[StreamedResponse]:
+        return self.transport.stream(method, url, params, json_body, data, trace)
+
+    async def request(self, method: str, url: str, params: Optional[Dict[str, Any]], json_body: Any, data: Any,
+                      trace: Optional[RequestTrace] = None) -> RawResponse:
+        if method.upper() not in self.methods or json_body is not None or data is not None:
+            return await self.transport.request(method, url, params, json_body, data, trace)
+
+        key = (method.upper(), url, orjson.dumps(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            status, content_type, body = await asyncio.shield(future)
+            if trace is not None:
+                trace.headers_received(status)
+                trace.body_received(len(body))
+            return status, content_type, body
+
+        future = asyncio.ensure_future(self.transport.request(method, url, params, json_body, data, trace))
+        self._in_flight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]